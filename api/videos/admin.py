@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.models import Group
 from django.utils.html import format_html
 
-from .models import Theme, Video
+from .models import Channel, Theme, Video
 
 admin.site.unregister(Group)
 
@@ -14,6 +14,12 @@ class ThemeAdmin(admin.ModelAdmin):
     search_fields = ("name",)
 
 
+@admin.register(Channel)
+class ChannelAdmin(admin.ModelAdmin):
+    list_display = ("pk", "name", "title", "youtube_id", "uploads_playlist_id", "created")
+    search_fields = ("name", "title", "youtube_id")
+
+
 @admin.register(Video)
 class VideoAdmin(admin.ModelAdmin):
     list_display = (
@@ -0,0 +1,48 @@
+from django.http import Http404
+
+from videos.models import Video
+
+from .utils.filters import get_video_filters
+from .utils.pool import video_pool
+from .utils.sampling import apick_random_videos
+
+BATCH_MAX_COUNT = 50
+
+
+async def get_random_videos(
+    request,
+    theme: str | None = None,
+    channel: str | None = None,
+    language: str | None = None,
+    count: int = 10,
+    seed: int | None = None,
+) -> dict:
+    """
+    Get up to `count` distinct random videos (at most 50), optionally filtered by theme, channel
+    and language, in one call. Videos are picked among the ones cached in DB.
+    With a seed, the same videos are returned as long as the videos in DB don't change (and the
+    response can be cached).
+    """
+    count = max(1, min(count, BATCH_MAX_COUNT))
+    filters: dict = await get_video_filters(theme, channel, language)
+    videos: list[Video] = await apick_random_videos(count, seed=seed, **filters)
+    if not videos:
+        if not channel and not language:
+            # Nothing cached yet for this theme: get its pool refilled for the next calls
+            video_pool.ensure_refill(filters["theme"])
+        raise Http404("No videos found")
+
+    return {
+        "count": len(videos),
+        "videos": [
+            {
+                "theme": theme,
+                "youtubeId": video.youtube_id,
+                "url": f"https://www.youtube.com/watch?v={video.youtube_id}",
+                "videoDuration": video.duration,
+                "bestStart": video.best_start,
+                "channelName": video.channel_name,
+            }
+            for video in videos
+        ],
+    }
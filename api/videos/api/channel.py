@@ -2,29 +2,33 @@ import random
 
 from django.http import Http404
 
-from videos.models import Video
+from videos.models import Channel, Video
 
+from .utils.channels import get_channel
 from .utils.db import populate_db
-from .utils.youtube import get_videos_from_youtube, update_videos_duration_from_youtube
+from .utils.sampling import apick_random_video
+from .utils.youtube import enrich_videos_from_youtube, get_channel_videos_from_youtube
 
 
-def get_random_video_from_channel(request, channel_name: str) -> dict:
+async def get_random_video_from_channel(request, channel_name: str) -> dict:
     """
-    Get a random YouTube video ID from a given channel.
+    Get a random YouTube video ID from a given channel (handle, ID or name).
     """
-    videos: list[Video] | None = get_videos_from_youtube(channel=channel_name)
-    if videos and len(videos):
-        populate_db(videos)
-        videos = update_videos_duration_from_youtube(videos=videos)
-        video: Video = random.choice(videos)
-    else:
-        try:
-            videos = list(Video.objects.filter(channel_name=channel_name))
-            if not videos:
-                raise Http404("No videos found for this channel")
-            video = random.choice(videos)
-        except Exception:
-            raise Http404
+    channel: Channel | None = await get_channel(channel_name)
+    videos: list[Video] | None = None
+    fresh: bool = False
+    if channel:
+        videos, fresh = await get_channel_videos_from_youtube(channel)
+    video: Video | None = None
+    if videos and fresh:
+        videos = await populate_db(videos)
+        videos = await enrich_videos_from_youtube(videos=videos)
+        video = random.choice(videos)
+    if not video:
+        # The videos of a cached response were saved in DB when it was fresh
+        video = await apick_random_video(channel_name=channel.title if channel else channel_name)
+    if not video:
+        raise Http404("No videos found for this channel")
 
     return {
         "theme": None,
@@ -1,26 +1,38 @@
-import random
-
 from django.http import Http404
 
 from videos.models import Video
 
+from .utils.filters import get_video_filters
+from .utils.sampling import apick_random_video
+
 
-def get_random_video_by_duration(request, min_minutes: int, max_minutes: int) -> dict:
+async def get_random_video_by_duration(
+    request,
+    min_minutes: int | None = None,
+    max_minutes: int | None = None,
+    theme: str | None = None,
+    channel: str | None = None,
+    language: str | None = None,
+) -> dict:
     """
-    Get a random video with duration between min and max minutes
+    Get a random video with duration between min and max minutes, optionally filtered by theme,
+    channel and language. Videos are picked among the ones cached in DB.
     """
-    min_duration = min_minutes * 60
-    max_duration = max_minutes * 60
+    min_duration: int | None = min_minutes * 60 if min_minutes is not None else None
+    max_duration: int | None = max_minutes * 60 if max_minutes is not None else None
 
-    videos = Video.objects.filter(duration__gte=min_duration, duration__lte=max_duration)
-    if not videos:
+    filters: dict = await get_video_filters(theme=theme, channel=channel, language=language)
+    video: Video | None = await apick_random_video(
+        min_duration=min_duration, max_duration=max_duration, **filters
+    )
+    if not video:
         raise Http404("No videos found in this duration range")
 
-    video = random.choice(videos)
     return {
-        "theme": None,
+        "theme": theme,
         "youtubeId": video.youtube_id,
         "url": f"https://www.youtube.com/watch?v={video.youtube_id}",
         "videoDuration": video.duration,
         "bestStart": video.best_start,
+        "channelName": video.channel_name,
     }
@@ -4,11 +4,28 @@ from django.http import Http404
 
 from videos.models import Video
 
-from .utils.db import populate_db
-from .utils.youtube import get_videos_from_youtube, update_videos_duration_from_youtube
+from .utils.db import populate_db, release_db_connection
+from .utils.sampling import apick_random_video
+from .utils.single_flight import SingleFlight
+from .utils.youtube import enrich_videos_from_youtube, get_videos_from_youtube
 
+# Concurrent requests of a language share one search (which costs 100 units of quota)
+language_searches = SingleFlight()
 
-def get_random_video_by_language(request, language_code: str) -> dict:
+
+async def get_new_videos_in_language(language_code: str) -> list[Video] | None:
+    try:
+        videos: list[Video] | None = await get_videos_from_youtube(language=language_code)
+        if videos:
+            videos = await populate_db(videos)
+            videos = await enrich_videos_from_youtube(videos=videos)
+        return videos
+    finally:
+        # The search may outlive the request which started it, if that one was cancelled
+        await release_db_connection()
+
+
+async def get_random_video_by_language(request, language_code: str) -> dict:
     """
     Get a random video in a specific language
     Uses YouTube's relevanceLanguage parameter
@@ -17,19 +34,15 @@ def get_random_video_by_language(request, language_code: str) -> dict:
     The relevanceLanguage parameter instructs the API to return search results that are most relevant to the specified language. (...) Please note that results in other languages will still be returned if they are highly relevant to the search query term.
     So endpoint is not required to return videos that are only in the specified language.
     """
-    videos: list[Video] | None = get_videos_from_youtube(language=language_code)
+    videos: list[Video] | None = await language_searches.do(
+        language_code, lambda: get_new_videos_in_language(language_code)
+    )
     if videos and len(videos):
-        populate_db(videos)
-        videos = update_videos_duration_from_youtube(videos=videos)
-        video: Video = random.choice(videos)
+        video: Video | None = random.choice(videos)
     else:
-        try:
-            videos = list(Video.objects.filter(language_code=language_code))
-            if not videos:
-                raise Http404("No videos found in this language")
-            video: Video = random.choice(videos)
-        except Exception:
-            raise Http404("No videos found in this language")
+        video = await apick_random_video(language_code=language_code)
+    if not video:
+        raise Http404("No videos found in this language")
 
     return {
         "theme": None,
@@ -1,13 +1,26 @@
 from ninja import Router
 
+from .batch import get_random_videos
 from .channel import get_random_video_from_channel
+from .duration import get_random_video_by_duration
 from .language import get_random_video_by_language
-from .theme import get_random_video_from_theme
-from .video import get_random_video
+from .shuffle import get_next_shuffled_video
+from .stats import get_youtube_cache_stats, get_youtube_quota_stats
+from .stream import stream_videos
+from .theme import get_random_video_from_theme, get_themes
+from .video import get_random_video, get_video
 
 router = Router(tags=["videos"])
 
 router.add_api_operation("/", ["GET"], get_random_video)
+router.add_api_operation("/batch", ["GET"], get_random_videos)
+router.add_api_operation("/themes", ["GET"], get_themes)
+router.add_api_operation("/video/{youtube_id}", ["GET"], get_video)
 router.add_api_operation("/theme/{theme_name}", ["GET"], get_random_video_from_theme)
 router.add_api_operation("/channel/{channel_name}", ["GET"], get_random_video_from_channel)
 router.add_api_operation("/language/{language_code}", ["GET"], get_random_video_by_language)
+router.add_api_operation("/duration", ["GET"], get_random_video_by_duration)
+router.add_api_operation("/shuffle", ["GET"], get_next_shuffled_video)
+router.add_api_operation("/stream", ["GET"], stream_videos)
+router.add_api_operation("/stats/youtube-cache", ["GET"], get_youtube_cache_stats)
+router.add_api_operation("/stats/youtube-quota", ["GET"], get_youtube_quota_stats)
@@ -0,0 +1,60 @@
+from django.core import signing
+from django.http import Http404, JsonResponse
+from ninja.errors import HttpError
+
+from videos.models import Video
+
+from .utils.filters import get_video_filters
+from .utils.shuffle import ShuffleCursor
+
+
+async def get_next_shuffled_video(
+    request,
+    token: str | None = None,
+    theme: str | None = None,
+    channel: str | None = None,
+    language: str | None = None,
+    seed: int | None = None,
+) -> dict:
+    """
+    Get the next video of a shuffled walk through the cached videos, optionally filtered by
+    theme, channel and language: no video comes twice before all the others came once.
+    The first call starts a walk (reproducible with a seed), and returns a token to pass to the
+    next call to get the next video (the filters are then taken from the token).
+    A 404 with a token means that no video was found this time in a long walk: the next call with
+    that token goes on from there.
+    """
+    if token:
+        try:
+            cursor: ShuffleCursor | None = ShuffleCursor.from_token(token)
+        except signing.BadSignature as e:
+            raise HttpError(400, "Invalid token") from e
+    else:
+        filters: dict = await get_video_filters(theme=theme, channel=channel, language=language)
+        cursor = await ShuffleCursor.start(
+            {
+                "theme_id": filters["theme"].pk if filters["theme"] else None,
+                "channel_name": filters["channel_name"],
+                "language_code": filters["language_code"],
+            },
+            seed=seed,
+        )
+    video: Video | None = await cursor.next() if cursor else None
+    if not video:
+        if cursor and 0 < cursor.index < len(cursor.permutation):
+            # Don't lose the part of the walk done
+            return JsonResponse(
+                {"detail": "No videos found", "token": cursor.to_token()}, status=404
+            )
+        raise Http404("No videos found")
+
+    return {
+        "theme": theme,
+        "youtubeId": video.youtube_id,
+        "url": f"https://www.youtube.com/watch?v={video.youtube_id}",
+        "videoDuration": video.duration,
+        "bestStart": video.best_start,
+        "channelName": video.channel_name,
+        "cycle": cursor.cycle,
+        "token": cursor.to_token(),
+    }
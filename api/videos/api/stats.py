@@ -0,0 +1,31 @@
+from ninja.errors import HttpError
+
+from vj_api.metrics import ais_allowed_to_read_metrics
+
+from .utils.quota import quota_scheduler
+from .utils.youtube_cache import youtube_cache
+
+
+async def check_stats_access(request) -> None:
+    """
+    Raises a 403 unless the request may read the metrics (see `vj_api.metrics`).
+    """
+    if not await ais_allowed_to_read_metrics(request):
+        raise HttpError(403, "Forbidden")
+
+
+async def get_youtube_cache_stats(request) -> dict:
+    """
+    Get the hit and miss counters of the YouTube responses cache (of this worker process).
+    """
+    await check_stats_access(request)
+    return youtube_cache.stats()
+
+
+async def get_youtube_quota_stats(request) -> dict:
+    """
+    Get the YouTube quota spent today and this minute (by all the worker processes), and the
+    units spent and calls denied per resource (by this worker process).
+    """
+    await check_stats_access(request)
+    return await quota_scheduler.stats()
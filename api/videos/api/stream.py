@@ -0,0 +1,93 @@
+import asyncio
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+
+import orjson
+from django.http import Http404, StreamingHttpResponse
+from ninja.errors import HttpError
+
+from videos.models import Video
+from vj_api.settings import VIDEO_STREAM_MAX_DURATION
+
+from .utils.db import release_db_connection
+from .utils.filters import get_video_filters
+from .utils.sampling import apick_random_video, apick_random_videos
+
+STREAM_CONTENT_TYPES: dict[str, str] = {
+    "sse": "text/event-stream",
+    "ndjson": "application/x-ndjson",
+}
+STREAM_MIN_INTERVAL = 1  # in seconds
+STREAM_MAX_AHEAD = 10
+STREAM_RECENT_VIDEOS = 20
+
+
+async def stream_videos(
+    request,
+    theme: str | None = None,
+    channel: str | None = None,
+    language: str | None = None,
+    interval: float = 10,
+    ahead: int = 2,
+    format: str = "sse",
+) -> StreamingHttpResponse:
+    """
+    Stream random videos as Server-Sent Events ("sse" format) or JSON lines ("ndjson" format),
+    optionally filtered by theme, channel and language: `ahead` videos right away, so that the
+    client can preload them, then a video every `interval` seconds, the pace the client plays
+    them. Videos are picked among the ones cached in DB.
+    Each video is only picked once the previous one is sent, so a slow client slows the stream
+    down instead of piling videos up. The stream ends after VIDEO_STREAM_MAX_DURATION seconds
+    (EventSource clients reconnect on their own).
+    """
+    if format not in STREAM_CONTENT_TYPES:
+        raise HttpError(400, f"Unknown format, expected one of {', '.join(STREAM_CONTENT_TYPES)}")
+    interval = max(interval, STREAM_MIN_INTERVAL)
+    ahead = max(1, min(ahead, STREAM_MAX_AHEAD))
+
+    filters: dict = await get_video_filters(theme=theme, channel=channel, language=language)
+    # Picked before streaming, to answer a 404 rather than an empty stream
+    first_videos: list[Video] = await apick_random_videos(ahead, **filters)
+    if not first_videos:
+        raise Http404("No videos found")
+
+    def format_event(video: Video, event_id: int) -> bytes:
+        data: bytes = orjson.dumps(
+            {
+                "theme": theme,
+                "youtubeId": video.youtube_id,
+                "url": f"https://www.youtube.com/watch?v={video.youtube_id}",
+                "videoDuration": video.duration,
+                "bestStart": video.best_start,
+                "channelName": video.channel_name,
+            }
+        )
+        if format == "ndjson":
+            return data + b"\n"
+        return b"id: %d\nevent: video\ndata: %s\n\n" % (event_id, data)
+
+    async def events() -> AsyncIterator[bytes]:
+        deadline: float = time.monotonic() + VIDEO_STREAM_MAX_DURATION
+        videos: list[Video] = first_videos
+        recent: deque[str] = deque(maxlen=STREAM_RECENT_VIDEOS)
+        event_id = 0
+        while True:
+            for video in videos:
+                event_id += 1
+                recent.append(video.youtube_id)
+                yield format_event(video, event_id)
+            if time.monotonic() + interval > deadline:
+                return
+            await release_db_connection()
+            await asyncio.sleep(interval)
+            video: Video | None = await apick_random_video(**filters)
+            if video and video.youtube_id in recent:
+                # Another try, not to play the same video again so soon
+                video = await apick_random_video(**filters)
+            videos = [video] if video else []
+
+    response = StreamingHttpResponse(events(), content_type=STREAM_CONTENT_TYPES[format])
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # don't let Nginx buffer the stream
+    return response
@@ -1,11 +1,28 @@
+from django.http import Http404
+
 from videos.models import Theme
 
+from .utils.themes import theme_registry
 from .video import return_random_video_info
 
 
-def get_random_video_from_theme(request, theme_name: str) -> dict:
+async def get_random_video_from_theme(request, theme_name: str) -> dict:
     """
     Get a random YouTube video ID a given theme.
     """
-    theme, created = Theme.objects.get_or_create(name=theme_name)
-    return return_random_video_info(theme=theme)
+    theme: Theme | None = await theme_registry.aget_or_create(theme_name)
+    if not theme:
+        raise Http404("Theme not found")
+    return await return_random_video_info(theme=theme)
+
+
+async def get_themes(request) -> dict:
+    """
+    Get the active themes, with their related words.
+    """
+    return {
+        "themes": [
+            {"name": theme.name, "relatedWords": theme.get_related_words()}
+            async for theme in Theme.objects.filter(active=True).order_by("name")
+        ]
+    }
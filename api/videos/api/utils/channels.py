@@ -0,0 +1,53 @@
+from django.db import IntegrityError
+from django.http import Http404
+
+from videos.models import Channel
+
+from .youtube import get_channel_from_youtube
+from .youtube_client import YouTubeError, log_youtube_error
+
+# Channels already resolved by this process, by normalised name
+_channels: dict[str, Channel] = {}
+
+
+def clear_channels() -> None:
+    """
+    Forget the channels resolved by this process (e.g. when one was changed in the admin).
+    """
+    _channels.clear()
+
+
+def normalise_channel_name(channel_name: str) -> str:
+    return channel_name.strip().lower()
+
+
+async def get_channel(channel_name: str) -> Channel | None:
+    """
+    Resolve a channel handle, ID or name: from memory, else from DB, else from YouTube (and then
+    save it in DB, so that the next requests for the same channel don't cost any quota).
+    Returns None if it can't be resolved for now (YouTube error or no quota left).
+    Raises Http404 if YouTube has no such channel.
+    """
+    name: str = normalise_channel_name(channel_name)
+    channel: Channel | None = _channels.get(name)
+    if channel:
+        return channel
+
+    channel = await Channel.objects.filter(name=name).afirst()
+    if not channel:
+        try:
+            channel = await get_channel_from_youtube(channel_name.strip())
+        except YouTubeError as e:
+            log_youtube_error(e)
+            return None
+        if not channel:
+            raise Http404("Channel not found")
+        channel.name = name
+        try:
+            await channel.asave()
+        except IntegrityError:
+            # Resolved by another process meanwhile
+            channel = await Channel.objects.aget(name=name)
+
+    _channels[name] = channel
+    return channel
@@ -1,15 +1,44 @@
-from django.db import IntegrityError
+from asgiref.sync import sync_to_async
+from django.db import connection
 
 from videos.models import Video
+from vj_api.metrics import DB_ROWS_WRITTEN, timed
 from vj_api.settings import logger
 
+from .versions import VIDEOS, abump_data_version
 
-def populate_db(videos: list[Video]) -> None:
-    for v in videos:
-        try:
-            v.save()
-            logger.info(f'Saved a new video ID "{v.pk}" in DB')
-        except IntegrityError as e:
-            logger.warning(f'Video "{v.youtube_id}" already in DB: {str(e)}')
-        except Exception as e:
-            logger.error(f'Error saving video "{v.youtube_id}" in DB: {str(e)}')
+
+@sync_to_async
+def release_db_connection() -> None:
+    """
+    Close the DB connection of the thread running the ORM calls of the current context, giving it
+    back to the pool. For the coroutines outliving their request (which closes its connection) or
+    waiting long between queries.
+    """
+    connection.close()
+
+
+@timed("populate_db")
+async def populate_db(videos: list[Video]) -> list[Video]:
+    """
+    Save the given videos with a single bulk insert, skipping the ones already in DB.
+    Returns the videos as persisted in DB, with their primary key and the duration and best start
+    they may already have.
+    """
+    if not videos:
+        return []
+    youtube_ids: list[str] = list(dict.fromkeys(v.youtube_id for v in videos))
+    persisted: dict[str, Video] = await Video.objects.ain_bulk(youtube_ids, field_name="youtube_id")
+    new_videos: dict[str, Video] = {}
+    for video in videos:
+        if video.youtube_id not in persisted:
+            new_videos.setdefault(video.youtube_id, video)
+    if new_videos:
+        # Still ignoring the conflicts, with the videos inserted concurrently by another request
+        await Video.objects.abulk_create(new_videos.values(), ignore_conflicts=True)
+        # Barring the rare ones inserted concurrently, which a bulk insert ignoring conflicts skips
+        DB_ROWS_WRITTEN.labels("insert").inc(len(new_videos))
+        persisted |= await Video.objects.ain_bulk(list(new_videos), field_name="youtube_id")
+        await abump_data_version(VIDEOS)
+        logger.info(f"Saved {len(new_videos)} new videos in DB")
+    return [persisted[youtube_id] for youtube_id in youtube_ids if youtube_id in persisted]
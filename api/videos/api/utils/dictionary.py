@@ -1,4 +1,11 @@
+import mmap
+import os
 import random
+import threading
+from array import array
+
+from vj_api.metrics import timed
+from vj_api.settings import BASE_DIR, logger
 
 DICTIONNARIES: dict = {
     "en": "vj_api/dictionaries/dict_EN.txt",
@@ -7,6 +14,76 @@ DICTIONNARIES: dict = {
 }
 
 
+class WordIndex:
+    """
+    Words of a dictionary file, served from a memory mapping of the file.
+    A companion ".idx" file holds the offsets of the start of each word, so that picking a random
+    word doesn't parse the dictionary. Both files are mapped read-only, hence shared by all the
+    worker processes through the page cache.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path: str = os.path.join(BASE_DIR, path)
+        self.index_path: str = f"{self.path}.idx"
+        self._words: mmap.mmap | None = None
+        self._offsets: memoryview | None = None
+        self._lock = threading.Lock()
+
+    def is_built(self) -> bool:
+        if not os.path.exists(self.index_path):
+            return False
+        return os.path.getmtime(self.index_path) >= os.path.getmtime(self.path)
+
+    def build(self) -> int:
+        """
+        Write the offsets file of the dictionary, and return the number of words.
+        """
+        with open(self.path, "rb") as f:
+            data: bytes = f.read()
+        offsets = array("I")
+        start = 0
+        while start < len(data):
+            end: int = data.find(b"\n", start)
+            if end == -1:
+                end = len(data)
+            if end > start:  # skip empty lines
+                offsets.append(start)
+            start = end + 1
+        # Write to a temporary file first, as other workers may be reading the index meanwhile
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            offsets.tofile(f)
+        os.replace(tmp_path, self.index_path)
+        logger.info(f'Built the word index of "{self.path}" ({len(offsets)} words)')
+        return len(offsets)
+
+    def open(self) -> None:
+        with self._lock:
+            if self._offsets is not None:
+                return
+            if not self.is_built():
+                self.build()
+            with open(self.path, "rb") as f:
+                words = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            with open(self.index_path, "rb") as f:
+                offsets = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._words = words
+            self._offsets = memoryview(offsets).cast("I")
+
+    def random_word(self) -> str:
+        if self._offsets is None:
+            self.open()
+        start: int = self._offsets[random.randrange(len(self._offsets))]
+        end: int = self._words.find(b"\n", start)
+        if end == -1:
+            end = len(self._words)
+        return self._words[start:end].decode()
+
+
+WORD_INDEXES: dict[str, WordIndex] = {lang: WordIndex(path) for lang, path in DICTIONNARIES.items()}
+
+
+@timed("get_random_word")
 def get_random_word(lang: str | None = None) -> str:
     """
     Get a random word from dictionary files.
@@ -14,5 +91,4 @@ def get_random_word(lang: str | None = None) -> str:
     """
     if not lang:
         lang = random.choice(list(DICTIONNARIES.keys()))
-    lines = open(DICTIONNARIES[lang]).read().splitlines()
-    return random.choice(lines)
+    return WORD_INDEXES[lang].random_word()
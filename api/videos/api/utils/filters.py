@@ -0,0 +1,26 @@
+from django.http import Http404
+
+from videos.models import Channel, Theme
+
+from .channels import get_channel
+from .themes import theme_registry
+
+
+async def get_video_filters(
+    theme: str | None = None, channel: str | None = None, language: str | None = None
+) -> dict:
+    """
+    Get the filters of `filter_videos` from the theme, channel and language parameters of a
+    request. Raises Http404 if the theme doesn't exist or isn't active.
+    """
+    theme_object: Theme | None = None
+    if theme:
+        theme_object = await theme_registry.aget(theme)
+        if not theme_object:
+            raise Http404("Theme not found")
+    channel_object: Channel | None = await get_channel(channel) if channel else None
+    return {
+        "theme": theme_object,
+        "channel_name": channel_object.title if channel_object else channel,
+        "language_code": language,
+    }
@@ -0,0 +1,162 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import os
+import random
+import threading
+import time
+from collections import deque
+
+from videos.models import Theme, Video
+from vj_api.settings import (
+    VIDEO_POOL_LOW_INVENTORY,
+    VIDEO_POOL_LOW_WATERMARK,
+    VIDEO_POOL_REFILL_BACKOFF,
+    VIDEO_POOL_SIZE,
+    YOUTUBE_API_RETRIES,
+    YOUTUBE_API_TIMEOUT,
+    YOUTUBE_LOCK_DIR,
+    logger,
+)
+
+from .db import populate_db, release_db_connection
+from .quota import HIGH_PRIORITY, NORMAL_PRIORITY
+from .sampling import apick_random_videos, filter_videos
+from .single_flight import SingleFlight
+from .youtube import enrich_videos_from_youtube, get_videos_from_youtube
+
+
+class VideoPool:
+    """
+    In-memory pools of ready-to-serve videos, one per theme (and one for no theme).
+    Drawing a video is O(1) and never waits on YouTube: when a pool goes under its low
+    watermark, it is refilled from YouTube in a background task. Refills run in an event loop of
+    their own (in a daemon thread of each process), so that they outlive the requests and their
+    event loops, such as the one of each request of a WSGI server.
+    Refills of themes with few videos cached in DB have priority in the YouTube quota, and a
+    refill which got no videos (e.g. denied by the quota) isn't retried before `backoff` seconds.
+    The refills of a theme are made one at a time across processes, with a lock file in
+    `lock_dir`: a process which waited for the refill of another one takes the videos it saved in
+    DB instead of searching YouTube again.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        low_watermark: int,
+        backoff: float,
+        lock_dir: str | None = None,
+        lock_timeout: float = 60,
+    ) -> None:
+        self.size = size
+        self.low_watermark = low_watermark
+        self.backoff = backoff
+        # Not striped: the refill of a theme mustn't wait for that of another one
+        self.single_flight = SingleFlight(lock_dir, lock_timeout=lock_timeout, striped=False)
+        self._pools: dict[int | None, deque[Video]] = {}
+        self._refills: dict[int | None, concurrent.futures.Future] = {}
+        self._retry_at: dict[int | None, float] = {}  # time.monotonic() of the next refill
+        self._lock = threading.Lock()  # of the refills, scheduled from the threads of requests
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_pid: int | None = None
+
+    def get_loop(self) -> asyncio.AbstractEventLoop:
+        """
+        Get the event loop of the refills, started on first use in each process.
+        """
+        if not self._loop or self._loop_pid != os.getpid():
+            # Started again in a forked process, which doesn't have the thread of its parent
+            self._loop, self._loop_pid = asyncio.new_event_loop(), os.getpid()
+            threading.Thread(target=self._loop.run_forever, name="video-pool", daemon=True).start()
+        return self._loop
+
+    def draw(self, theme: Theme | None = None) -> Video | None:
+        """
+        Pop a random video from the pool of the given theme, or return None if it is empty.
+        Schedules a refill if the pool is under its low watermark.
+        """
+        key: int | None = theme.pk if theme else None
+        pool = self._pools.setdefault(key, deque())
+        video: Video | None = pool.popleft() if pool else None
+        self.ensure_refill(theme)
+        return video
+
+    def ensure_refill(self, theme: Theme | None = None) -> None:
+        """
+        Schedule a refill of the pool of the given theme if it is under its low watermark, unless
+        one is pending or backing off.
+        """
+        key: int | None = theme.pk if theme else None
+        with self._lock:
+            if (
+                len(self._pools.get(key, ())) <= self.low_watermark
+                and key not in self._refills
+                and time.monotonic() >= self._retry_at.get(key, 0)
+            ):
+                # In an empty context, not to inherit the context variables of the request (such
+                # as the asgiref context whose thread runs its ORM calls until it ends)
+                self._refills[key] = contextvars.Context().run(
+                    asyncio.run_coroutine_threadsafe, self._refill(theme), self.get_loop()
+                )
+
+    async def wait_for_refill(self, theme: Theme | None = None, timeout: float | None = None):
+        """
+        Wait until the pending refill of the given theme is done, if there is one.
+        Only meant for cold starts, when there is nothing else to serve.
+        """
+        key: int | None = theme.pk if theme else None
+        refill: concurrent.futures.Future | None = self._refills.get(key)
+        if refill:
+            try:
+                # Shielded, so that the refill goes on for the next requests if this one gives up
+                await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(refill)), timeout=timeout)
+            except TimeoutError:
+                logger.warning(f'Timed out waiting for the video pool of theme "{theme}"')
+
+    async def _refill(self, theme: Theme | None) -> None:
+        key: int | None = theme.pk if theme else None
+        # Backs off unless the refill gets videos
+        self._retry_at[key] = time.monotonic() + self.backoff
+        try:
+            async with self.single_flight.lock(f"refill:{key}") as waited:
+                if waited:
+                    # Another process refilled this theme meanwhile
+                    videos: list[Video] | None = await apick_random_videos(self.size, theme=theme)
+                else:
+                    videos = await self._get_new_videos(theme)
+            if videos:
+                self._retry_at.pop(key, None)
+                random.shuffle(videos)
+                pool = self._pools.setdefault(key, deque())
+                pool.extend(videos[: max(self.size - len(pool), 0)])
+                logger.info(f'Refilled the video pool of theme "{theme}" with {len(videos)} videos')
+        except Exception as e:
+            logger.error(f'Error refilling the video pool of theme "{theme}": {str(e)}')
+        finally:
+            with self._lock:
+                self._refills.pop(key, None)
+            # No request ends with the refill, to close its DB connection
+            await release_db_connection()
+
+    async def _get_new_videos(self, theme: Theme | None) -> list[Video] | None:
+        """
+        Search new videos of the given theme on YouTube, and save them in DB with their details.
+        """
+        # Bounded count, as the exact number of videos doesn't matter past the threshold
+        inventory: int = await filter_videos(theme=theme)[:VIDEO_POOL_LOW_INVENTORY].acount()
+        priority: int = HIGH_PRIORITY if inventory < VIDEO_POOL_LOW_INVENTORY else NORMAL_PRIORITY
+        videos: list[Video] | None = await get_videos_from_youtube(theme=theme, priority=priority)
+        if videos:
+            videos = await populate_db(videos)
+            videos = await enrich_videos_from_youtube(videos=videos)
+        return videos
+
+
+video_pool = VideoPool(
+    size=VIDEO_POOL_SIZE,
+    low_watermark=VIDEO_POOL_LOW_WATERMARK,
+    backoff=VIDEO_POOL_REFILL_BACKOFF,
+    lock_dir=os.path.join(YOUTUBE_LOCK_DIR, "refills") if YOUTUBE_LOCK_DIR else None,
+    # A refill makes a search and a videos list call, each one lasting at most that long
+    lock_timeout=2 * YOUTUBE_API_TIMEOUT * (YOUTUBE_API_RETRIES + 1),
+)
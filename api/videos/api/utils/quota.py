@@ -0,0 +1,158 @@
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from django.core.cache import caches
+
+from vj_api.metrics import YOUTUBE_QUOTA_UNITS
+from vj_api.settings import (
+    YOUTUBE_CIRCUIT_BREAKER_COOLDOWN,
+    YOUTUBE_CIRCUIT_BREAKER_THRESHOLD,
+    YOUTUBE_QUOTA_DAILY_BUDGET,
+    YOUTUBE_QUOTA_MINUTE_BUDGET,
+    YOUTUBE_QUOTA_RESERVE,
+    logger,
+)
+
+# Units of quota charged by YouTube for a call to each resource of the API
+QUOTA_COSTS: dict[str, int] = {"search": 100, "videos": 1, "channels": 1, "playlistItems": 1}
+DEFAULT_QUOTA_COST = 1
+# The daily quota of the YouTube API is reset at midnight, Pacific time
+QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+
+# The per-minute counters cycle through a few keys, so that the expired ones get reused
+# instead of piling up in the cache
+MINUTE_SLOTS = 10
+
+NORMAL_PRIORITY = 0
+HIGH_PRIORITY = 1  # allowed to spend the reserved share of the daily budget
+
+
+def get_quota_day() -> str:
+    return datetime.now(QUOTA_TIMEZONE).date().isoformat()
+
+
+def get_minute_key() -> str:
+    return f"youtube-quota:minute:{int(time.time() // 60) % MINUTE_SLOTS}"
+
+
+def get_seconds_until_quota_reset() -> float:
+    now: datetime = datetime.now(QUOTA_TIMEZONE)
+    midnight: datetime = now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    return midnight.timestamp() - now.timestamp()
+
+
+class QuotaScheduler:
+    """
+    Accounting of the YouTube API quota, shared by the worker processes through the "quota"
+    Django cache (exact with Redis only, as the other backends don't increment atomically).
+    A call is allowed only if its cost fits in the daily and per-minute budgets, the last
+    `reserve` share of the daily budget being kept for high priority calls.
+    A circuit breaker denies all calls until the quota reset once YouTube answers that the quota
+    is exceeded, or for `cooldown` seconds after `threshold` consecutive failed calls.
+    """
+
+    def __init__(
+        self,
+        daily_budget: int,
+        minute_budget: int,
+        reserve: float,
+        breaker_threshold: int,
+        breaker_cooldown: float,
+    ) -> None:
+        self.daily_budget = daily_budget
+        self.minute_budget = minute_budget
+        self.reserve = reserve
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        # Units spent and calls denied by this process, per resource
+        self.spent: dict[str, int] = {}
+        self.denied: dict[str, int] = {}
+        self._failures = 0
+        self._open_until = 0.0  # time.monotonic() until which the circuit breaker is open
+        self._cache = caches["quota"]
+
+    def is_open(self) -> bool:
+        return time.monotonic() < self._open_until
+
+    async def acquire(self, resource: str, priority: int = NORMAL_PRIORITY) -> bool:
+        """
+        Spend the cost of a call to the given resource, or return False if it isn't allowed.
+        """
+        cost: int = QUOTA_COSTS.get(resource, DEFAULT_QUOTA_COST)
+        daily_budget: int = self.daily_budget
+        if priority < HIGH_PRIORITY:
+            daily_budget = int(self.daily_budget * (1 - self.reserve))
+        day_key: str = f"youtube-quota:day:{get_quota_day()}"
+        minute_key: str = get_minute_key()
+
+        allowed: bool = not self.is_open() and await self._spend(
+            day_key, cost, daily_budget, timeout=2 * 24 * 3600
+        )
+        if allowed and not await self._spend(minute_key, cost, self.minute_budget, timeout=120):
+            await self._cache.adecr(day_key, cost)
+            allowed = False
+
+        counters: dict[str, int] = self.spent if allowed else self.denied
+        counters[resource] = counters.get(resource, 0) + (cost if allowed else 1)
+        if allowed:
+            YOUTUBE_QUOTA_UNITS.labels(resource).inc(cost)
+        return allowed
+
+    def record_success(self) -> None:
+        self._failures = 0
+
+    async def record_failure(self, quota_exceeded: bool = False) -> None:
+        if quota_exceeded:
+            # Make every process see the daily budget as spent, until the quota reset
+            await self._cache.aset(
+                f"youtube-quota:day:{get_quota_day()}", self.daily_budget, timeout=2 * 24 * 3600
+            )
+            self._open(get_seconds_until_quota_reset())
+            return
+        self._failures += 1
+        if self._failures >= self.breaker_threshold:
+            self._failures = 0
+            self._open(self.breaker_cooldown)
+
+    async def stats(self) -> dict:
+        day_spent: int = await self._cache.aget(f"youtube-quota:day:{get_quota_day()}", 0)
+        minute_spent: int = await self._cache.aget(get_minute_key(), 0)
+        return {
+            "dailyBudget": self.daily_budget,
+            "minuteBudget": self.minute_budget,
+            "reserve": self.reserve,
+            "spentToday": day_spent,
+            "spentThisMinute": minute_spent,
+            "secondsUntilReset": round(get_seconds_until_quota_reset()),
+            "circuitBreakerOpen": self.is_open(),
+            "spentByResource": self.spent,
+            "deniedByResource": self.denied,
+        }
+
+    def _open(self, duration: float) -> None:
+        self._open_until = time.monotonic() + duration
+        logger.warning(f"YouTube circuit breaker open for {round(duration)} seconds")
+
+    async def _spend(self, key: str, cost: int, budget: int, timeout: int) -> bool:
+        await self._cache.aadd(key, 0, timeout)
+        try:
+            total: int = await self._cache.aincr(key, cost)
+        except ValueError:  # the counter expired in between
+            await self._cache.aset(key, cost, timeout)
+            total = cost
+        # Some backends reset the expiry of a counter when incrementing it
+        await self._cache.atouch(key, timeout)
+        if total > budget:
+            await self._cache.adecr(key, cost)
+            return False
+        return True
+
+
+quota_scheduler = QuotaScheduler(
+    daily_budget=YOUTUBE_QUOTA_DAILY_BUDGET,
+    minute_budget=YOUTUBE_QUOTA_MINUTE_BUDGET,
+    reserve=YOUTUBE_QUOTA_RESERVE,
+    breaker_threshold=YOUTUBE_CIRCUIT_BREAKER_THRESHOLD,
+    breaker_cooldown=YOUTUBE_CIRCUIT_BREAKER_COOLDOWN,
+)
@@ -0,0 +1,84 @@
+import random
+
+from django.db import connection
+from django.db.models import QuerySet
+
+from videos.models import Theme, Video
+from vj_api.metrics import timed
+
+
+def filter_videos(
+    theme: Theme | None = None,
+    channel_name: str | None = None,
+    language_code: str | None = None,
+    min_duration: int | None = None,
+    max_duration: int | None = None,
+) -> QuerySet[Video]:
+    """
+    Get the cached videos matching all the given filters (durations are in seconds).
+    """
+    videos: QuerySet[Video] = Video.objects.all()
+    if theme:
+        videos = videos.filter(theme=theme)
+    if channel_name:
+        videos = videos.filter(channel_name=channel_name)
+    if language_code:
+        videos = videos.filter(language_code=language_code)
+    if min_duration is not None:
+        videos = videos.filter(duration__gte=min_duration)
+    if max_duration is not None:
+        videos = videos.filter(duration__lte=max_duration)
+    return videos
+
+
+def pick_random_video(**filters) -> Video | None:
+    """
+    Pick a random cached video matching the given filters (see `filter_videos`).
+    Instead of loading the whole table, it seeks the first video whose random key follows a random
+    value, which takes one or two indexed queries whatever the size of the table.
+    """
+    videos: QuerySet[Video] = filter_videos(**filters).order_by("random_key")
+    video: Video | None = videos.filter(random_key__gte=random.random()).first()
+    if not video:
+        # Wrap around to the beginning of the key space
+        video = videos.first()
+    return video
+
+
+@timed("pick_random_video")
+async def apick_random_video(**filters) -> Video | None:
+    """
+    Async version of `pick_random_video`.
+    """
+    videos: QuerySet[Video] = filter_videos(**filters).order_by("random_key")
+    video: Video | None = await videos.filter(random_key__gte=random.random()).afirst()
+    if not video:
+        video = await videos.afirst()
+    return video
+
+
+@timed("pick_random_videos")
+async def apick_random_videos(count: int, seed: int | None = None, **filters) -> list[Video]:
+    """
+    Pick up to `count` distinct random cached videos matching the given filters, in a single
+    query: the videos whose random keys follow a random value, wrapping around to the beginning
+    of the key space (the union of two indexed range scans).
+    With a seed, the same videos are picked as long as the videos in DB don't change.
+    """
+    rng = random.Random(seed)  # seeded from the system randomness if seed is None
+    videos: QuerySet[Video] = filter_videos(**filters).order_by("random_key")
+    key: float = rng.random()
+    after: QuerySet[Video] = videos.filter(random_key__gte=key)[:count]
+    before: QuerySet[Video] = videos.filter(random_key__lt=key)[:count]
+    if connection.features.supports_slicing_ordering_in_compound:
+        picked: list[Video] = [v async for v in after.union(before, all=True)]
+        # The union isn't ordered: put the wrapped around videos last
+        picked.sort(key=lambda v: (v.random_key < key, v.random_key))
+    else:
+        # e.g. SQLite can't union sliced queries
+        picked = [v async for v in after]
+        if len(picked) < count:
+            picked += [v async for v in before]
+    picked = picked[:count]
+    rng.shuffle(picked)
+    return picked
@@ -0,0 +1,224 @@
+import hashlib
+import random
+
+from django.core import signing
+from django.db.models import Max, Min, QuerySet
+
+from videos.models import Video
+
+from .sampling import filter_videos
+
+FEISTEL_ROUNDS = 4
+SHUFFLE_TOKEN_SALT = "videos.shuffle"
+MIN_WINDOW = 16  # primary keys looked up per query
+MAX_WINDOW = 4096
+MAX_QUERIES = 12  # per video handed out, before seeking the next one from the matching videos
+SEEK_MAX_VIDEOS = 5000  # matching videos whose positions in the walk are computed to seek
+
+
+class FeistelPermutation:
+    """
+    Pseudo-random permutation of range(size), given by its seed: a balanced Feistel network over
+    the smallest even number of bits covering the range, cycle-walking the values past its end.
+    Any item is computed in O(1) time and memory, without storing the permutation.
+    """
+
+    def __init__(self, size: int, seed: int) -> None:
+        self.size = size
+        self.seed = seed
+        self.half_bits: int = max((size - 1).bit_length() + 1, 2) // 2
+        self.half_mask: int = (1 << self.half_bits) - 1
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, index: int) -> int:
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+        value: int = self._encrypt(index)
+        while value >= self.size:
+            # The network permutes a range up to 4 times larger: walk its cycle back into ours
+            value = self._encrypt(value)
+        return value
+
+    def index(self, value: int) -> int:
+        """
+        Inverse of the permutation: the index of the given value.
+        """
+        if not 0 <= value < self.size:
+            raise ValueError(value)
+        index: int = self._decrypt(value)
+        while index >= self.size:
+            index = self._decrypt(index)
+        return index
+
+    def _round(self, round_index: int, value: int) -> int:
+        digest: bytes = hashlib.blake2b(
+            f"{self.seed}:{round_index}:{value}".encode(), digest_size=8
+        ).digest()
+        return int.from_bytes(digest) & self.half_mask
+
+    def _encrypt(self, value: int) -> int:
+        left: int = value >> self.half_bits
+        right: int = value & self.half_mask
+        for round_index in range(FEISTEL_ROUNDS):
+            left, right = right, left ^ self._round(round_index, right)
+        return (left << self.half_bits) | right
+
+    def _decrypt(self, value: int) -> int:
+        left: int = value >> self.half_bits
+        right: int = value & self.half_mask
+        for round_index in reversed(range(FEISTEL_ROUNDS)):
+            left, right = right ^ self._round(round_index, left), left
+        return (left << self.half_bits) | right
+
+
+class ShuffleCursor:
+    """
+    Position in a shuffled walk through the cached videos matching some filters, handing out
+    every video once before any repeat. The walk is a permutation of the primary key range of the
+    videos when it started (videos added since join the next cycle), skipping the keys of deleted
+    or filtered out videos. Its state is a few numbers, carried by a signed token.
+    """
+
+    def __init__(
+        self,
+        filters: dict,
+        seed: int,
+        first_pk: int,
+        last_pk: int,
+        window: int,
+        index: int = 0,
+        cycle: int = 0,
+    ) -> None:
+        self.filters = filters
+        self.seed = seed
+        self.first_pk = first_pk
+        self.last_pk = last_pk
+        self.window = window
+        self.index = index
+        self.cycle = cycle
+        self.permutation = FeistelPermutation(last_pk - first_pk + 1, seed)
+
+    @classmethod
+    async def start(cls, filters: dict, seed: int | None = None, cycle: int = 0):
+        """
+        Start a walk through the videos matching the given filters (ID of their theme, channel
+        name and language code), or return None if there are none.
+        """
+        videos: QuerySet[Video] = cls.get_videos(filters)
+        stats: dict = await videos.aaggregate(first_pk=Min("pk"), last_pk=Max("pk"))
+        if stats["first_pk"] is None:
+            return None
+        count: int = await videos.acount()
+        size: int = stats["last_pk"] - stats["first_pk"] + 1
+        # Enough keys per query to find a matching video at once, given the filter density
+        window: int = min(max(size * 2 // count, MIN_WINDOW), MAX_WINDOW)
+        return cls(
+            filters,
+            seed=seed if seed is not None else random.getrandbits(32),
+            first_pk=stats["first_pk"],
+            last_pk=stats["last_pk"],
+            window=window,
+            cycle=cycle,
+        )
+
+    @classmethod
+    def from_token(cls, token: str) -> "ShuffleCursor":
+        """
+        Raises signing.BadSignature if the token is invalid.
+        """
+        state: dict = signing.loads(token, salt=SHUFFLE_TOKEN_SALT)
+        return cls(
+            filters=state["f"],
+            seed=state["s"],
+            first_pk=state["a"],
+            last_pk=state["b"],
+            window=state["w"],
+            index=state["i"],
+            cycle=state["c"],
+        )
+
+    def to_token(self) -> str:
+        state: dict = {
+            "f": self.filters,
+            "s": self.seed,
+            "a": self.first_pk,
+            "b": self.last_pk,
+            "w": self.window,
+            "i": self.index,
+            "c": self.cycle,
+        }
+        return signing.dumps(state, salt=SHUFFLE_TOKEN_SALT, compress=True)
+
+    @staticmethod
+    def get_videos(filters: dict) -> QuerySet[Video]:
+        videos: QuerySet[Video] = filter_videos(
+            channel_name=filters.get("channel_name"), language_code=filters.get("language_code")
+        )
+        if filters.get("theme_id"):
+            videos = videos.filter(theme_id=filters["theme_id"])
+        return videos
+
+    async def next(self) -> Video | None:
+        """
+        Hand out the next video of the walk, starting a new cycle once all were handed out.
+        Returns None if no videos match the filters anymore, or if none were found within
+        MAX_QUERIES queries and too many videos match the filters to seek the next one (the next
+        call goes on from there).
+        """
+        window: int = self.window
+        for _ in range(MAX_QUERIES):
+            if self.index >= len(self.permutation) and not await self._start_new_cycle():
+                return None
+            end: int = min(self.index + window, len(self.permutation))
+            pks: list[int] = [self.first_pk + self.permutation[i] for i in range(self.index, end)]
+            found: dict[int, Video] = await self.get_videos(self.filters).ain_bulk(pks)
+            for offset, pk in enumerate(pks):
+                if pk in found:
+                    self.index += offset + 1
+                    return found[pk]
+            self.index = end
+            # Fewer matching videos are left towards the end of a cycle: look further each time
+            window = min(window * 2, MAX_WINDOW)
+        return await self._seek()
+
+    async def _seek(self) -> Video | None:
+        """
+        Hand out the next video of the walk from the positions of all the matching videos, when
+        there are few of them (e.g. a theme with few videos in a large table), as they may be too
+        far apart in the walk to be found by looking up the keys in order.
+        """
+        for _ in range(2):  # in this cycle, or else in the next one
+            if self.index >= len(self.permutation) and not await self._start_new_cycle():
+                return None
+            videos: QuerySet[Video] = self.get_videos(self.filters).filter(
+                pk__range=(self.first_pk, self.last_pk)
+            )
+            pks: list[int] = [
+                pk async for pk in videos.values_list("pk", flat=True)[: SEEK_MAX_VIDEOS + 1]
+            ]
+            if len(pks) > SEEK_MAX_VIDEOS:
+                return None
+            positions: list[int] = [
+                position
+                for position in (self.permutation.index(pk - self.first_pk) for pk in pks)
+                if position >= self.index
+            ]
+            if positions:
+                self.index = min(positions) + 1
+                return await videos.filter(
+                    pk=self.first_pk + self.permutation[self.index - 1]
+                ).afirst()
+            self.index = len(self.permutation)
+        return None
+
+    async def _start_new_cycle(self) -> bool:
+        # With the videos added since the previous cycle started
+        cursor: ShuffleCursor | None = await self.start(
+            self.filters, seed=self.seed + 1, cycle=self.cycle + 1
+        )
+        if not cursor:
+            return False
+        self.__dict__.update(cursor.__dict__)
+        return True
@@ -0,0 +1,83 @@
+import asyncio
+import hashlib
+import os
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no lock between processes
+    fcntl = None
+
+LOCK_STRIPES = 256  # lock files, shared by the keys with the same hash modulo
+LOCK_POLL_INTERVAL = 0.05  # in seconds
+
+
+class SingleFlight:
+    """
+    Coalescing of concurrent identical calls: while a call is in flight, the calls with the same
+    key await its result instead of being made again. Calls are shared as asyncio tasks within a
+    process (hence within an event loop, so there is one instance per loop), and serialised across
+    processes by a lock file in `lock_dir`, so the later ones can find the result in a cache shared
+    by the processes. A call waits at most `lock_timeout` seconds for the lock, then goes ahead.
+    The keys share LOCK_STRIPES lock files, unless `striped` is False: then each key gets its own
+    lock file, for the calls which must not wait for others (the keys must be few).
+    """
+
+    def __init__(
+        self, lock_dir: str | None = None, lock_timeout: float = 30, striped: bool = True
+    ) -> None:
+        self.lock_dir = lock_dir if fcntl else None
+        self.lock_timeout = lock_timeout
+        self.striped = striped
+        self._flights: dict[str, asyncio.Task] = {}
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, exist_ok=True)
+
+    def is_in_flight(self, key: str) -> bool:
+        return key in self._flights
+
+    async def do(self, key: str, func: Callable[[], Awaitable]):
+        """
+        Return the result of `func()`, or of the call in flight with the same key.
+        """
+        task: asyncio.Task | None = self._flights.get(key)
+        if not task:
+            task = self._flights[key] = asyncio.ensure_future(func())
+            task.add_done_callback(lambda _: self._flights.pop(key, None))
+        # A cancelled caller doesn't cancel the call for the others
+        return await asyncio.shield(task)
+
+    @asynccontextmanager
+    async def lock(self, key: str) -> AsyncIterator[bool]:
+        """
+        Hold the lock of the given key across processes, yielding whether another process held it
+        first (its call may have cached the result meanwhile).
+        """
+        if not self.lock_dir:
+            yield False
+            return
+        name: str = hashlib.sha1(key.encode()).hexdigest()
+        if self.striped:
+            name = str(int(name, 16) % LOCK_STRIPES)
+        fd: int = os.open(os.path.join(self.lock_dir, f"{name}.lock"), os.O_RDWR | os.O_CREAT)
+        try:
+            waited: bool = False
+            locked: bool = False
+            deadline: float = time.monotonic() + self.lock_timeout
+            while not locked and time.monotonic() < deadline:
+                try:
+                    # Non-blocking, not to block the event loop
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    locked = True
+                except BlockingIOError:
+                    waited = True
+                    await asyncio.sleep(LOCK_POLL_INTERVAL)
+            try:
+                yield waited
+            finally:
+                if locked:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
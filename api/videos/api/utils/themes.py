@@ -0,0 +1,62 @@
+import time
+
+from django.db import IntegrityError
+
+from videos.models import Theme
+from vj_api.settings import THEME_REGISTRY_TTL
+
+from .versions import THEMES, aget_data_version
+
+
+class ThemeRegistry:
+    """
+    In-process map of all the themes by name, so that resolving a theme costs no DB query.
+    It is loaded on first use, and reloaded once the themes changed: right away in the process
+    saving them (see videos.signals), and within `ttl` seconds in the others, which check the
+    version of the themes in the shared cache at most that often.
+    """
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self._themes: dict[str, Theme] | None = None
+        self._version: int | None = None
+        self._checked_at = 0.0  # time.monotonic() of the last version check
+
+    def clear(self) -> None:
+        self._themes = None
+
+    async def aget(self, name: str) -> Theme | None:
+        """
+        Get an active theme by name, or None if there is no such active theme.
+        """
+        theme: Theme | None = (await self._aget_themes()).get(name)
+        return theme if theme and theme.active else None
+
+    async def aget_or_create(self, name: str) -> Theme | None:
+        """
+        Get an active theme by name, creating it if it doesn't exist yet.
+        Returns None if the theme exists but was deactivated.
+        """
+        themes: dict[str, Theme] = await self._aget_themes()
+        theme: Theme | None = themes.get(name)
+        if not theme:
+            try:
+                theme = await Theme.objects.acreate(name=name)
+            except IntegrityError:
+                # Created by another process meanwhile
+                theme = await Theme.objects.aget(name=name)
+            themes[name] = theme
+        return theme if theme.active else None
+
+    async def _aget_themes(self) -> dict[str, Theme]:
+        if time.monotonic() - self._checked_at >= self.ttl:
+            self._checked_at = time.monotonic()
+            version: int = await aget_data_version(THEMES)
+            if version != self._version:
+                self._themes, self._version = None, version
+        if self._themes is None:
+            self._themes = {theme.name: theme async for theme in Theme.objects.all()}
+        return self._themes
+
+
+theme_registry = ThemeRegistry(ttl=THEME_REGISTRY_TTL)
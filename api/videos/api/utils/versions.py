@@ -0,0 +1,38 @@
+import time
+
+from django.core.cache import caches
+
+# Versions of the data behind the cacheable responses, bumped whenever the data changes.
+# They are kept in the "shared" cache, so that all the worker processes agree on them.
+THEMES = "themes"
+VIDEOS = "videos"
+
+
+def _make_key(scope: str) -> str:
+    return f"data-version:{scope}"
+
+
+def _make_initial_version() -> int:
+    # The cache may lose a version (restart, clear, culling): a version seeded from the time, in
+    # microseconds, is past all the versions handed out before, whose ETags then can't match
+    return time.time_ns() // 1000
+
+
+def get_data_version(scope: str) -> int:
+    return caches["shared"].get_or_set(_make_key(scope), _make_initial_version, timeout=None)
+
+
+async def aget_data_version(scope: str) -> int:
+    return await caches["shared"].aget_or_set(_make_key(scope), _make_initial_version, timeout=None)
+
+
+def bump_data_version(scope: str) -> None:
+    cache = caches["shared"]
+    cache.add(_make_key(scope), _make_initial_version(), timeout=None)
+    cache.incr(_make_key(scope))
+
+
+async def abump_data_version(scope: str) -> None:
+    cache = caches["shared"]
+    await cache.aadd(_make_key(scope), _make_initial_version(), timeout=None)
+    await cache.aincr(_make_key(scope))
@@ -1,33 +1,44 @@
-import json
+import random
+import re
 
-import requests
-from django.db import IntegrityError
-from django.http import Http404
+from django.utils.dateparse import parse_datetime
 
-from videos.models import Theme, Video
-from vj_api.helpers import convert_youtube_duration_to_seconds
-from vj_api.settings import YOUTUBE_API_KEY, logger
+from videos.models import Channel, Theme, Video
+from vj_api.helpers import compute_best_start, convert_youtube_duration_to_seconds
+from vj_api.metrics import DB_ROWS_WRITTEN, timed
+from vj_api.settings import logger
 
 from .dictionary import get_random_word
+from .quota import NORMAL_PRIORITY
+from .versions import VIDEOS, abump_data_version
+from .youtube_client import (
+    YouTubeError,
+    get_youtube_client,
+    log_youtube_error,
+)
 
-YOUTUBE_SEARCH_URL = "https://www.googleapis.com/youtube/v3/search"
-YOUTUBE_DOCS_URL = "https://www.googleapis.com/youtube/v3/videos"
+YOUTUBE_MAX_IDS = 50  # Maximum number of video IDs in a single `videos.list` call
+CHANNEL_ID_REGEX = re.compile(r"^UC[\w-]{22}$")
 
 
-def get_videos_from_youtube(
+@timed("get_videos_from_youtube")
+async def get_videos_from_youtube(
     theme: Theme | None = None,
-    channel: str | None = None,
     language: str | None = None,
     published_after: str | None = None,
     published_before: str | None = None,
     order: str = "relevance",
+    priority: int = NORMAL_PRIORITY,
 ) -> list[Video] | None:
-    search_string: str = get_random_word() if not channel else ""
+    search_string: str = get_random_word()
     if theme:
+        # Randomly choose between a random word and a related word to go with the theme
+        related_words: list[str] = theme.get_related_words()
+        if related_words and random.choice([True, False]):
+            search_string = random.choice(related_words).replace("_", " ")
         search_string = f"{theme.name} {search_string}"
 
     params = {
-        "key": YOUTUBE_API_KEY,
         "part": "snippet",
         "type": "video",
         "q": search_string,
@@ -35,8 +46,6 @@ def get_videos_from_youtube(
         "maxResults": 50,
     }
 
-    if channel:
-        params["channelId"] = get_channel_id(channel)
     if language:
         params["relevanceLanguage"] = language
     if published_after:
@@ -44,141 +53,181 @@ def get_videos_from_youtube(
     if published_before:
         params["publishedBefore"] = published_before
 
-    response_content = requests.get(
-        YOUTUBE_SEARCH_URL,
-        params=params,
-    ).content
-
-    content: dict = json.loads(response_content)
-    if content.get("error", None):
-        if content["error"].get("code", None) == 403:
-            logger.error('Forbidden by YouTube: "{}"'.format(content["error"]["message"]))
-        else:
-            logger.error('Error: "{}"'.format(content["error"]))
-    else:
-        videos: list = []
-        for v in content["items"]:
-            try:
-                video = Video(
-                    youtube_id=v["id"]["videoId"],
-                    title=v["snippet"]["title"],
-                    thumbnail=v["snippet"]["thumbnails"]["high"]["url"],
-                    search_string=search_string,
-                    channel_name=v["snippet"]["channelTitle"],
-                    language_code=language,
-                )
-                if theme:
-                    video.theme = theme
-                videos.append(video)
-                logger.info(f'Got a new video ID "{video.title}" from YouTube')
-            except Exception as e:
-                logger.error(str(e))
-        return videos
-
-
-def update_videos_view_count_from_youtube(videos: list[Video]) -> list[Video]:
-    youtube_ids: list = [v.youtube_id for v in videos if not v.view_count][:49]
-    response_content = requests.get(
-        YOUTUBE_DOCS_URL,
-        params={
-            "key": YOUTUBE_API_KEY,
-            "part": "statistics",
-            "id": ",".join(youtube_ids),
-        },
-    ).content
-
-    content: dict = json.loads(response_content)
-    if content.get("error", None):
-        if content["error"].get("code", None) == 403:
-            logger.error('Forbidden by YouTube: "{}"'.format(content["error"]["message"]))
-        else:
-            logger.error('Error: "{}"'.format(content["error"]))
-    else:
-        for item in content["items"]:
-            try:
-                for idx, video in enumerate(videos):
-                    if video.youtube_id == item["id"]:
-                        video.view_count = int(item["statistics"]["viewCount"])
-                        try:
-                            video.save()
-                        except IntegrityError as e:
-                            logger.error(
-                                f"Video \"{video.youtube_id}\" couldn't be updated because of a duplicate: {str(e)}'. This error should not happen."
-                            )
-                        except Exception as e:
-                            logger.error(
-                                f'Error updating video "{video.youtube_id}" in DB: {str(e)}'
-                            )
-                        else:
-                            videos[idx] = video
-            except Exception as e:
-                logger.error(str(e))
+    try:
+        # Not cached: the search string is random, so the same search is hardly ever made again
+        content: dict = await get_youtube_client().get(
+            "search", params, priority=priority, cached=False
+        )
+    except YouTubeError as e:
+        log_youtube_error(e)
+        return None
+
+    videos: list = []
+    for v in content["items"]:
+        try:
+            video = Video(
+                youtube_id=v["id"]["videoId"],
+                title=v["snippet"]["title"],
+                thumbnail=v["snippet"]["thumbnails"]["high"]["url"],
+                search_string=search_string,
+                channel_name=v["snippet"]["channelTitle"],
+                language_code=language,
+                published_at=parse_datetime(v["snippet"]["publishedAt"])
+                if "publishedAt" in v["snippet"]
+                else None,
+            )
+            if theme:
+                video.theme = theme
+            videos.append(video)
+            logger.info(f'Got a new video ID "{video.title}" from YouTube')
+        except Exception as e:
+            logger.error(str(e))
     return videos
 
 
-def update_videos_duration_from_youtube(videos: list[Video]) -> list[Video]:
-    youtube_ids: list = [v.youtube_id for v in videos if not v.duration][:49]
-    response_content = requests.get(
-        YOUTUBE_DOCS_URL,
-        params={
-            "key": YOUTUBE_API_KEY,
-            "part": "contentDetails",
-            "type": "video",
-            "id": ",".join(youtube_ids),
-        },
-    ).content
-
-    content: dict = json.loads(response_content)
-    if content.get("error", None):
-        if content["error"].get("code", None) == 403:
-            logger.error('Forbidden by YouTube: "{}"'.format(content["error"]["message"]))
-        else:
-            logger.error('Error: "{}"'.format(content["error"]))
-    else:
-        for item in content["items"]:
-            try:
-                for idx, video in enumerate(videos):
-                    if video.youtube_id == item["id"]:
-                        duration_yt: str = item["contentDetails"]["duration"]
-                        video.duration = convert_youtube_duration_to_seconds(duration_yt)
-                        try:
-                            video.save()
-                        except IntegrityError as e:
-                            logger.error(
-                                f"Video \"{video.youtube_id}\" couldn't be updated because of a duplicate: {str(e)}'. This error should not happen."
-                            )
-                        except Exception as e:
-                            logger.error(
-                                f'Error updating video "{video.youtube_id}" in DB: {str(e)}'
-                            )
-                        else:
-                            videos[idx] = video
-            except Exception as e:
-                logger.error(str(e))
+async def enrich_videos_from_youtube(videos: list[Video]) -> list[Video]:
+    """
+    Fill in the missing details of the given videos (already saved in DB) with a single
+    `videos.list` call, and save them with a single bulk update of the changed fields.
+    """
+    missing_details: list[Video] = [
+        v for v in videos if v.duration is None or v.view_count is None or v.published_at is None
+    ]
+    try:
+        await update_videos_details(missing_details[:YOUTUBE_MAX_IDS])
+    except YouTubeError as e:
+        log_youtube_error(e)
     return videos
 
 
-def get_channel_id(channel_name: str) -> str:
+@timed("update_videos_details")
+async def update_videos_details(videos: list[Video]) -> list[Video]:
     """
-    Get YouTube channel ID from channel name/handle using YouTube API
+    Get the duration, view count, publication date and description of up to 50 videos (already
+    saved in DB) with a single `videos.list` call, guess their best start if they have none, and
+    save the changed ones with a single bulk update.
+    Returns the updated videos. Raises YouTubeError.
     """
-    response_content = requests.get(
-        "https://www.googleapis.com/youtube/v3/search",
-        params={
-            "key": YOUTUBE_API_KEY,
-            "part": "snippet",
-            "type": "channel",
-            "q": channel_name,
-            "maxResults": 1,
-        },
-    ).content
-
-    content: dict = json.loads(response_content)
-    if content.get("error", None):
-        logger.error(f"Error getting channel ID: {content.get('error')}")
-        raise Http404("Channel not found")
-
+    videos_by_id: dict[str, Video] = {v.youtube_id: v for v in videos}
+    if not videos_by_id:
+        return []
+    content: dict = await get_youtube_client().get(
+        "videos", {"part": "contentDetails,statistics,snippet", "id": ",".join(videos_by_id)}
+    )
+
+    updated_videos: list[Video] = []
+    updated_fields: set[str] = set()
+    for item in content["items"]:
+        video: Video | None = videos_by_id.get(item["id"])
+        if not video:
+            continue
+        try:
+            fields: dict = {}
+            if "duration" in item.get("contentDetails", {}):
+                fields["duration"] = convert_youtube_duration_to_seconds(
+                    item["contentDetails"]["duration"]
+                )
+            if "viewCount" in item.get("statistics", {}):
+                fields["view_count"] = int(item["statistics"]["viewCount"])
+            if "publishedAt" in item.get("snippet", {}):
+                fields["published_at"] = parse_datetime(item["snippet"]["publishedAt"])
+            if "description" in item.get("snippet", {}):
+                fields["description"] = item["snippet"]["description"]
+            if video.best_start is None:
+                fields["best_start"] = compute_best_start(
+                    fields.get("duration", video.duration),
+                    fields.get("description", video.description),
+                )
+        except Exception as e:
+            logger.error(f'Error reading the details of video "{video.youtube_id}": {str(e)}')
+            continue
+        changed: set[str] = {f for f, value in fields.items() if getattr(video, f) != value}
+        for f in changed:
+            setattr(video, f, fields[f])
+        if changed and video.pk:
+            updated_videos.append(video)
+            updated_fields |= changed
+
+    if updated_videos:
+        await Video.objects.abulk_update(updated_videos, fields=sorted(updated_fields))
+        DB_ROWS_WRITTEN.labels("update").inc(len(updated_videos))
+        await abump_data_version(VIDEOS)
+        logger.info(f"Updated the details of {len(updated_videos)} videos in DB")
+    return updated_videos
+
+
+async def get_channel_videos_from_youtube(channel: Channel) -> tuple[list[Video] | None, bool]:
+    """
+    Get the latest videos uploaded by a channel, from its uploads playlist (a single
+    `playlistItems.list` call, costing 1 unit of quota instead of 100 for a search), and whether
+    they are fresh from YouTube (else they were already saved in DB, see `YouTubeClient.fetch`).
+    """
+    if not channel.uploads_playlist_id:
+        return None, False
+    try:
+        content, fresh = await get_youtube_client().fetch(
+            "playlistItems",
+            {
+                "part": "snippet,contentDetails",
+                "playlistId": channel.uploads_playlist_id,
+                "maxResults": 50,
+            },
+        )
+    except YouTubeError as e:
+        log_youtube_error(e)
+        return None, False
+
+    videos: list = []
+    for v in content["items"]:
+        try:
+            published_at: str | None = v["contentDetails"].get("videoPublishedAt")
+            video = Video(
+                youtube_id=v["contentDetails"]["videoId"],
+                title=v["snippet"]["title"],
+                thumbnail=v["snippet"]["thumbnails"]["high"]["url"],
+                channel_name=channel.title,
+                published_at=parse_datetime(published_at) if published_at else None,
+            )
+            videos.append(video)
+            logger.info(f'Got a new video ID "{video.title}" from YouTube')
+        except Exception as e:
+            # Private and deleted videos of the playlist have no thumbnails
+            logger.warning(f'Skipped a video of channel "{channel.title}": {str(e)}')
+    return videos, fresh
+
+
+async def get_channel_from_youtube(channel_name: str) -> Channel | None:
+    """
+    Look up a channel by its ID or handle (1 unit of quota), else by its name with a search
+    (100 units). Returns None if there is no such channel, raises YouTubeError.
+    The returned channel isn't saved in DB.
+    """
+    part = "snippet,contentDetails"
+    content: dict = {}
+    if CHANNEL_ID_REGEX.match(channel_name):
+        content = await get_youtube_client().get("channels", {"part": part, "id": channel_name})
+    elif not re.search(r"\s", channel_name):
+        content = await get_youtube_client().get(
+            "channels", {"part": part, "forHandle": channel_name}
+        )
     if not content.get("items"):
-        raise Http404("Channel not found")
-
-    return content["items"][0]["id"]["channelId"]
+        search: dict = await get_youtube_client().get(
+            "search",
+            {"part": "snippet", "type": "channel", "q": channel_name, "maxResults": 1},
+        )
+        if not search.get("items"):
+            return None
+        content = await get_youtube_client().get(
+            "channels", {"part": part, "id": search["items"][0]["id"]["channelId"]}
+        )
+        if not content.get("items"):
+            return None
+
+    item: dict = content["items"][0]
+    return Channel(
+        youtube_id=item["id"],
+        title=item["snippet"]["title"],
+        uploads_playlist_id=item.get("contentDetails", {})
+        .get("relatedPlaylists", {})
+        .get("uploads", None),
+    )
@@ -0,0 +1,127 @@
+import hashlib
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+
+from vj_api.metrics import YOUTUBE_CACHE_LOOKUPS
+from vj_api.settings import (
+    YOUTUBE_CACHE_BACKEND,
+    YOUTUBE_CACHE_MAX_ENTRIES,
+    YOUTUBE_CACHE_TTL,
+)
+
+
+class YouTubeCache:
+    """
+    Cache of YouTube API responses, keyed by the resource and the normalised request parameters.
+    Subclasses implement the storage; this base class never hits.
+    """
+
+    backend: str = "none"
+
+    def __init__(self, ttl: int, max_entries: int) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(resource: str, params: dict) -> str:
+        # The API key doesn't change the response, and params order doesn't matter
+        normalised: str = "&".join(
+            f"{name}={params[name]}" for name in sorted(params) if name != "key"
+        )
+        return f"youtube:{resource}:{hashlib.sha1(normalised.encode()).hexdigest()}"
+
+    async def get(self, resource: str, params: dict) -> dict | None:
+        content: dict | None = await self._get(self.make_key(resource, params))
+        if content is None:
+            self.misses += 1
+            YOUTUBE_CACHE_LOOKUPS.labels("miss").inc()
+        else:
+            self.hits += 1
+            YOUTUBE_CACHE_LOOKUPS.labels("hit").inc()
+        return content
+
+    async def set(self, resource: str, params: dict, content: dict) -> None:
+        await self._set(self.make_key(resource, params), content)
+
+    def stats(self) -> dict:
+        lookups: int = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "ttl": self.ttl,
+            "maxEntries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": self.hits / lookups if lookups else None,
+        }
+
+    async def _get(self, key: str) -> dict | None:
+        return None
+
+    async def _set(self, key: str, content: dict) -> None:
+        pass
+
+
+class MemoryYouTubeCache(YouTubeCache):
+    """
+    In-process LRU cache, evicting the least recently used response beyond `max_entries`.
+    """
+
+    backend = "memory"
+
+    def __init__(self, ttl: int, max_entries: int) -> None:
+        super().__init__(ttl, max_entries)
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+
+    async def _get(self, key: str) -> dict | None:
+        entry: tuple[float, dict] | None = self._entries.get(key)
+        if not entry:
+            return None
+        expires_at, content = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return content
+
+    async def _set(self, key: str, content: dict) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, content)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {**super().stats(), "entries": len(self._entries)}
+
+
+class DjangoYouTubeCache(YouTubeCache):
+    """
+    Cache stored in the "youtube" cache of the Django CACHES setting (file-based by default, or
+    Redis...), hence shared between worker processes. Its TTL and size are set in CACHES.
+    """
+
+    backend = "django"
+
+    def __init__(self, ttl: int, max_entries: int) -> None:
+        super().__init__(ttl, max_entries)
+        self._cache = caches["youtube"]
+
+    async def _get(self, key: str) -> dict | None:
+        return await self._cache.aget(key)
+
+    async def _set(self, key: str, content: dict) -> None:
+        await self._cache.aset(key, content)
+
+
+YOUTUBE_CACHE_BACKENDS: dict[str, type[YouTubeCache]] = {
+    "none": YouTubeCache,
+    "memory": MemoryYouTubeCache,
+    "django": DjangoYouTubeCache,
+}
+
+youtube_cache: YouTubeCache = YOUTUBE_CACHE_BACKENDS[YOUTUBE_CACHE_BACKEND](
+    ttl=YOUTUBE_CACHE_TTL, max_entries=YOUTUBE_CACHE_MAX_ENTRIES
+)
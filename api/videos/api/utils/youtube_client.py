@@ -0,0 +1,221 @@
+import asyncio
+import time
+import weakref
+
+import httpx
+
+from vj_api.metrics import YOUTUBE_CALL_SECONDS, YOUTUBE_CALLS
+from vj_api.settings import (
+    YOUTUBE_API_KEY,
+    YOUTUBE_API_RETRIES,
+    YOUTUBE_API_TIMEOUT,
+    YOUTUBE_API_URL,
+    YOUTUBE_LOCK_DIR,
+    logger,
+)
+
+from .quota import NORMAL_PRIORITY, QuotaScheduler, quota_scheduler
+from .single_flight import SingleFlight
+from .youtube_cache import YouTubeCache, youtube_cache
+
+RETRY_STATUS_CODES: set[int] = {500, 502, 503, 504}
+RETRY_BACKOFF = 0.5  # in seconds, doubled at each retry
+QUOTA_ERROR_REASONS: set[str] = {"quotaExceeded", "dailyLimitExceeded"}
+
+
+class YouTubeError(Exception):
+    """
+    Error answered by the YouTube API (code is None if the API couldn't be reached at all).
+    """
+
+    def __init__(self, code: int | None, message: str, reason: str | None = None) -> None:
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.reason = reason
+
+
+class YouTubeQuotaError(YouTubeError):
+    """
+    Call not made, as it doesn't fit in the quota budget or the circuit breaker is open.
+    """
+
+    def __init__(self, resource: str) -> None:
+        super().__init__(None, f'No quota left for a "{resource}" call', reason="quotaScheduler")
+
+
+class YouTubeClient:
+    """
+    Async client for the YouTube Data API v3.
+    Connections are kept alive in a pool (using HTTP/2 when possible), requests have a timeout,
+    and network or server errors are retried with an exponential backoff.
+    Successful responses are cached, so identical calls don't cost quota again until they expire.
+    Other calls are only made if the quota scheduler (if any) allows it, and the cached ones only
+    once at a time: identical concurrent calls wait for the one in flight, in this process or in
+    another one (whose response they get from the cache if it's shared by the processes). The
+    uncached searches of random words are coalesced by their callers instead (see VideoPool).
+    """
+
+    def __init__(
+        self,
+        api_key: str | None = YOUTUBE_API_KEY,
+        base_url: str = YOUTUBE_API_URL,
+        timeout: float = YOUTUBE_API_TIMEOUT,
+        retries: int = YOUTUBE_API_RETRIES,
+        transport: httpx.AsyncBaseTransport | None = None,
+        cache: YouTubeCache = youtube_cache,
+        scheduler: QuotaScheduler | None = quota_scheduler,
+        lock_dir: str | None = YOUTUBE_LOCK_DIR,
+    ) -> None:
+        self.api_key = api_key
+        self.retries = retries
+        self.cache = cache
+        self.scheduler = scheduler
+        # A call waits for the one in another process at most as long as that one may last
+        self.single_flight = SingleFlight(lock_dir, lock_timeout=timeout * (retries + 1))
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=timeout,
+            http2=True,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            transport=transport,
+        )
+
+    async def get(
+        self, resource: str, params: dict, priority: int = NORMAL_PRIORITY, cached: bool = True
+    ) -> dict:
+        """
+        Call a resource of the API ("search", "videos"...) and return its JSON content.
+        Calls whose parameters are random (e.g. searches of random words) should pass
+        `cached=False`, as their responses would never be requested again and would only evict
+        the useful ones from the cache.
+        Raises YouTubeError if the API answers with an error, or YouTubeQuotaError without calling
+        the API if the call isn't allowed by the quota scheduler.
+        """
+        content, _ = await self.fetch(resource, params, priority=priority, cached=cached)
+        return content
+
+    async def fetch(
+        self, resource: str, params: dict, priority: int = NORMAL_PRIORITY, cached: bool = True
+    ) -> tuple[dict, bool]:
+        """
+        Same as `get`, also returning whether the content is fresh, i.e. this call got it from the
+        API (not from the cache, nor from an identical call made at the same time), so that the
+        callers save its data once only.
+        """
+        if not cached:
+            return await self._call_with_quota(resource, params, priority, cached=False), True
+        cached_content: dict | None = await self.cache.get(resource, params)
+        if cached_content is not None:
+            YOUTUBE_CALLS.labels(resource, "cached").inc()
+            return cached_content, False
+        key: str = self.cache.make_key(resource, params)
+        if self.single_flight.is_in_flight(key):
+            YOUTUBE_CALLS.labels(resource, "coalesced").inc()
+            content, _ = await self.single_flight.do(key, lambda: None)
+            return content, False
+        return await self.single_flight.do(key, lambda: self._call(key, resource, params, priority))
+
+    async def _call(
+        self, key: str, resource: str, params: dict, priority: int
+    ) -> tuple[dict, bool]:
+        async with self.single_flight.lock(key) as waited:
+            if waited:
+                # Another process made the same call meanwhile
+                cached_content: dict | None = await self.cache.get(resource, params)
+                if cached_content is not None:
+                    YOUTUBE_CALLS.labels(resource, "cached").inc()
+                    return cached_content, False
+            return await self._call_with_quota(resource, params, priority), True
+
+    async def _call_with_quota(
+        self, resource: str, params: dict, priority: int, cached: bool = True
+    ) -> dict:
+        if self.scheduler and not await self.scheduler.acquire(resource, priority):
+            YOUTUBE_CALLS.labels(resource, "denied").inc()
+            raise YouTubeQuotaError(resource)
+
+        start: float = time.perf_counter()
+        try:
+            content: dict = await self._get(resource, params)
+        except YouTubeError as e:
+            YOUTUBE_CALLS.labels(resource, "error").inc()
+            if self.scheduler and (
+                e.code is None or e.code >= 500 or e.reason in QUOTA_ERROR_REASONS
+            ):
+                await self.scheduler.record_failure(quota_exceeded=e.reason in QUOTA_ERROR_REASONS)
+            raise
+        finally:
+            YOUTUBE_CALL_SECONDS.labels(resource).observe(time.perf_counter() - start)
+        YOUTUBE_CALLS.labels(resource, "ok").inc()
+        if self.scheduler:
+            self.scheduler.record_success()
+        if cached:
+            await self.cache.set(resource, params, content)
+        return content
+
+    async def _get(self, resource: str, params: dict) -> dict:
+        for attempt in range(self.retries + 1):
+            try:
+                response: httpx.Response = await self._client.get(
+                    resource, params={"key": self.api_key, **params}
+                )
+            except httpx.TransportError as e:
+                if attempt == self.retries:
+                    raise YouTubeError(None, f"{type(e).__name__}: {str(e)}") from e
+                logger.warning(f'Retrying YouTube "{resource}" call after error: {str(e)}')
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt == self.retries:
+                    break
+                logger.warning(f'Retrying YouTube "{resource}" call after {response.status_code}')
+            await asyncio.sleep(RETRY_BACKOFF * 2**attempt)
+
+        try:
+            content: dict = response.json()
+        except ValueError as e:
+            raise YouTubeError(response.status_code, f"Invalid response: {str(e)}") from e
+        if content.get("error", None):
+            errors: list = content["error"].get("errors") or [{}]
+            raise YouTubeError(
+                content["error"].get("code", None),
+                content["error"].get("message", str(content["error"])),
+                reason=errors[0].get("reason", None),
+            )
+        return content
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+# httpx clients can't be shared between event loops, so there is one client per running loop
+_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def get_youtube_client() -> YouTubeClient:
+    """
+    Get the YouTube client of the running event loop.
+    """
+    loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+    client: YouTubeClient | None = _clients.get(loop)
+    if not client:
+        client = _clients[loop] = YouTubeClient()
+    return client
+
+
+def set_youtube_client(
+    client: YouTubeClient, loop: asyncio.AbstractEventLoop | None = None
+) -> None:
+    """
+    Use the given client in the given event loop, the running one by default (e.g. one with a
+    stub transport).
+    """
+    _clients[loop or asyncio.get_running_loop()] = client
+
+
+def log_youtube_error(error: YouTubeError) -> None:
+    if isinstance(error, YouTubeQuotaError):
+        logger.warning(f"Skipped a YouTube call: {error.message}")
+    elif error.code == 403:
+        logger.error(f'Forbidden by YouTube: "{error.message}"')
+    else:
+        logger.error(f'Error: "{error.message}"')
@@ -0,0 +1,198 @@
+import asyncio
+import base64
+import hashlib
+import json
+import random
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+
+import httpx
+
+
+class RecordedYouTubeResponses:
+    """
+    Stub of the YouTube API answering `videos.list` calls from recorded video resources, to run
+    the YouTube jobs without network nor quota (e.g. in tests). The recording is a JSON file with
+    a list of `videos.list` items, or a whole `videos.list` response.
+    Calls to other resources are answered with no items.
+    """
+
+    def __init__(self, items: list[dict]) -> None:
+        self.videos: dict[str, dict] = {item["id"]: item for item in items}
+        self.calls = 0
+
+    @classmethod
+    def from_file(cls, path: str) -> "RecordedYouTubeResponses":
+        with open(path) as f:
+            content: dict | list = json.load(f)
+        return cls(content["items"] if isinstance(content, dict) else content)
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        resource: str = request.url.path.rstrip("/").rsplit("/", 1)[-1]
+        items: list[dict] = []
+        if resource == "videos":
+            youtube_ids: list[str] = request.url.params.get("id", "").split(",")
+            items = [self.videos[i] for i in youtube_ids if i in self.videos]
+        return httpx.Response(200, json={"kind": f"youtube#{resource}ListResponse", "items": items})
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+
+STUB_VIDEO_ID_PREFIX = "stub-"  # so that the fake videos saved in DB can be told apart
+STUB_CHANNEL_COUNT = 20
+
+
+def make_stub_id(length: int, *parts) -> str:
+    digest: bytes = hashlib.blake2b(":".join(map(str, parts)).encode(), digest_size=24).digest()
+    return base64.urlsafe_b64encode(digest).decode()[:length]
+
+
+def make_error(code: int, reason: str, message: str) -> dict:
+    return {"error": {"code": code, "message": message, "errors": [{"reason": reason}]}}
+
+
+class FakeYouTubeAPI:
+    """
+    Stub of the YouTube API making up consistent resources, to load test the API without network
+    nor quota: `search.list` of videos (paginated, `pages` pages per query) or channels,
+    `videos.list`, `channels.list` (by ID or handle) and `playlistItems.list`. The same call
+    always gets the same items.
+    Each call takes about `latency` seconds, and fails with a 503 with a probability of
+    `error_rate`, or with a 403 "quotaExceeded" with a probability of `quota_error_rate`.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.1,
+        error_rate: float = 0,
+        quota_error_rate: float = 0,
+        pages: int = 5,
+        seed: int | None = None,
+    ) -> None:
+        self.latency = latency
+        self.error_rate = error_rate
+        self.quota_error_rate = quota_error_rate
+        self.pages = pages
+        self.random = random.Random(seed)
+        self.calls: dict[str, int] = {}
+
+    def get_latency(self) -> float:
+        return self.latency * self.random.uniform(0.5, 1.5)
+
+    def respond(self, resource: str, params: dict) -> tuple[int, dict]:
+        """
+        Get the status code and JSON content of the response to a call.
+        """
+        self.calls[resource] = self.calls.get(resource, 0) + 1
+        draw: float = self.random.random()
+        if draw < self.quota_error_rate:
+            return 403, make_error(403, "quotaExceeded", "The request cannot be completed")
+        if draw < self.quota_error_rate + self.error_rate:
+            return 503, make_error(503, "backendError", "Backend Error")
+        make_content: Callable[[dict], dict] | None = {
+            "search": self.search,
+            "videos": self.videos,
+            "channels": self.channels,
+            "playlistItems": self.playlist_items,
+        }.get(resource)
+        if not make_content:
+            return 404, make_error(404, "notFound", f'Unknown resource "{resource}"')
+        return 200, {"kind": f"youtube#{resource}ListResponse", **make_content(params)}
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(self.get_latency())
+        resource: str = request.url.path.rstrip("/").rsplit("/", 1)[-1]
+        status_code, content = self.respond(resource, dict(request.url.params))
+        return httpx.Response(status_code, json=content)
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    def search(self, params: dict) -> dict:
+        query: str = params.get("q", "")
+        if params.get("type") == "channel":
+            channel_id: str = f"UC{make_stub_id(22, 'channel', query)}"
+            return {"items": [{"id": {"kind": "youtube#channel", "channelId": channel_id}}]}
+        page: int = int(params.get("pageToken", "0") or 0)
+        count: int = int(params.get("maxResults", 5))
+        items: list[dict] = []
+        for index in range(count):
+            youtube_id: str = STUB_VIDEO_ID_PREFIX + make_stub_id(11, query, page, index)
+            channel: int = int.from_bytes(youtube_id.encode()[-2:]) % STUB_CHANNEL_COUNT
+            items.append(
+                {
+                    "id": {"kind": "youtube#video", "videoId": youtube_id},
+                    "snippet": {
+                        **self.make_snippet(youtube_id),
+                        "channelTitle": f"Stub channel {channel}",
+                    },
+                }
+            )
+        content: dict = {"pageInfo": {"totalResults": self.pages * count}, "items": items}
+        if page + 1 < self.pages:
+            content["nextPageToken"] = str(page + 1)
+        return content
+
+    def videos(self, params: dict) -> dict:
+        items: list[dict] = []
+        for youtube_id in filter(None, params.get("id", "").split(",")):
+            draw = random.Random(youtube_id)
+            duration: int = draw.randrange(30, 3600)
+            description: str = "A video made up by the YouTube API stub"
+            if draw.random() < 0.5:
+                chapters: list[int] = [0, *sorted(draw.sample(range(10, duration), 3))]
+                description += "\n" + "\n".join(
+                    f"{start // 60}:{start % 60:02d} Part {i}" for i, start in enumerate(chapters)
+                )
+            items.append(
+                {
+                    "id": youtube_id,
+                    "snippet": {**self.make_snippet(youtube_id), "description": description},
+                    "contentDetails": {"duration": f"PT{duration // 60}M{duration % 60}S"},
+                    "statistics": {"viewCount": str(int(draw.paretovariate(1) * 100))},
+                }
+            )
+        return {"items": items}
+
+    def channels(self, params: dict) -> dict:
+        channel_id: str | None = params.get("id")
+        if not channel_id and params.get("forHandle"):
+            channel_id = f"UC{make_stub_id(22, 'channel', params['forHandle'].lstrip('@'))}"
+        if not channel_id:
+            return {"items": []}
+        item: dict = {
+            "id": channel_id,
+            "snippet": {"title": f"Stub channel {channel_id[-6:]}"},
+            "contentDetails": {"relatedPlaylists": {"uploads": f"UU{channel_id[2:]}"}},
+        }
+        return {"items": [item]}
+
+    def playlist_items(self, params: dict) -> dict:
+        playlist_id: str = params.get("playlistId", "")
+        items: list[dict] = []
+        for index in range(int(params.get("maxResults", 5))):
+            youtube_id: str = STUB_VIDEO_ID_PREFIX + make_stub_id(11, playlist_id, index)
+            snippet: dict = self.make_snippet(youtube_id)
+            items.append(
+                {
+                    "snippet": snippet,
+                    "contentDetails": {
+                        "videoId": youtube_id,
+                        "videoPublishedAt": snippet["publishedAt"],
+                    },
+                }
+            )
+        return {"items": items}
+
+    @staticmethod
+    def make_snippet(youtube_id: str) -> dict:
+        published_at: datetime = datetime(2010, 1, 1, tzinfo=UTC) + timedelta(
+            minutes=int.from_bytes(youtube_id.encode()[-3:]) % 8_000_000
+        )
+        return {
+            "title": f"Stub video {youtube_id}",
+            "publishedAt": published_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "thumbnails": {"high": {"url": f"https://i.ytimg.com/vi/{youtube_id}/hqdefault.jpg"}},
+        }
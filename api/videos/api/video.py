@@ -1,32 +1,35 @@
-import random
-
 from django.http import Http404
 
-from videos.models import Video
+from videos.models import Theme, Video
+from vj_api.metrics import VIDEO_PICKS
+from vj_api.settings import VIDEO_POOL_COLD_START_TIMEOUT
 
-from .utils.db import populate_db
-from .utils.youtube import get_videos_from_youtube, update_videos_duration_from_youtube
+from .utils.pool import video_pool
+from .utils.sampling import apick_random_video
 
 
-def get_random_video(request) -> dict:
+async def get_random_video(request) -> dict:
     """
     Get a random YouTube video ID with no specific theme.
     """
-    return return_random_video_info(theme=None)
-
-
-def return_random_video_info(theme=None) -> dict:
-    videos: list[Video] | None = get_videos_from_youtube(theme=theme)
-    if videos and len(videos):
-        populate_db(videos)
-        videos = update_videos_duration_from_youtube(videos=videos)
-        video: Video = random.choice(videos)
-    else:
-        try:
-            videos = list(Video.objects.all())
-            video: Video = random.choice(videos)
-        except Exception:
-            raise Http404
+    return await return_random_video_info(theme=None)
+
+
+async def return_random_video_info(theme: Theme | None = None) -> dict:
+    source: str = "pool"
+    video: Video | None = video_pool.draw(theme)
+    if not video:
+        # The pool is empty, fall back to the videos cached in DB
+        source = "db"
+        video = await apick_random_video(theme=theme)
+    if not video:
+        # Nothing cached yet for this theme (cold start), wait for the pool to be filled
+        source = "cold_start"
+        await video_pool.wait_for_refill(theme, timeout=VIDEO_POOL_COLD_START_TIMEOUT)
+        video = video_pool.draw(theme)
+    if not video:
+        raise Http404("No videos found for this theme")
+    VIDEO_PICKS.labels(source).inc()
     return {
         "theme": theme.name if theme else None,
         "youtubeId": video.youtube_id,
@@ -34,3 +37,27 @@ def return_random_video_info(theme=None) -> dict:
         "videoDuration": video.duration,
         "bestStart": video.best_start,
     }
+
+
+async def get_video(request, youtube_id: str) -> dict:
+    """
+    Get the details of a video cached in DB, by its YouTube ID.
+    """
+    video: Video | None = (
+        await Video.objects.select_related("theme").filter(youtube_id=youtube_id).afirst()
+    )
+    if not video:
+        raise Http404("Video not found")
+    return {
+        "theme": video.theme.name if video.theme else None,
+        "youtubeId": video.youtube_id,
+        "url": f"https://www.youtube.com/watch?v={video.youtube_id}",
+        "title": video.title,
+        "thumbnail": video.thumbnail,
+        "videoDuration": video.duration,
+        "bestStart": video.best_start,
+        "channelName": video.channel_name,
+        "languageCode": video.language_code,
+        "viewCount": video.view_count,
+        "publishedAt": video.published_at,
+    }
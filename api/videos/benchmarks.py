@@ -0,0 +1,354 @@
+"""
+Benchmarks of the API hot paths, run with `./manage.py benchmark`.
+The synthetic videos they need are created in a transaction which is rolled back at the end.
+Their results can be saved as a baseline, which later runs are compared to.
+"""
+
+import functools
+import json
+import os
+import random
+import re
+import statistics
+import string
+import time
+from collections.abc import Callable, Iterator
+from datetime import UTC, datetime, timedelta
+
+from asgiref.sync import async_to_sync
+from django.db import IntegrityError, connection, transaction
+from django.db.models import QuerySet
+
+from videos.api.utils.db import populate_db
+from videos.api.utils.dictionary import DICTIONNARIES, WORD_INDEXES, get_random_word
+from videos.api.utils.sampling import (
+    apick_random_video,
+    apick_random_videos,
+    filter_videos,
+    pick_random_video,
+)
+from videos.models import Theme, Video
+from vj_api.helpers.word_relations import (
+    _get_related_words,
+    get_related_words,
+    load_word_relations,
+)
+from vj_api.helpers.youtube_duration import convert_youtube_duration_to_seconds
+
+LANGUAGE_CODES: list[str] = ["en", "fr", "ja", "es", "de"]
+SEED_BATCH_SIZE = 5000
+YOUTUBE_SEARCH_SIZE = 50
+HELPER_CALLS = 1000  # calls per run of the helper benchmarks, whose single calls take microseconds
+YOUTUBE_DURATIONS: list[str] = ["PT45S", "PT4M13S", "PT12M", "PT1H2M3S", "PT3H", "P1DT2H", "P0D"]
+THEMES: list[str] = ["music", "ocean", "cooking", "football", "jazz", "mountain", "chanson", "猫"]
+REGRESSION_MIN_DELTA = 0.05  # in milliseconds, slowdowns below this are timer noise
+
+
+def create_themes(count: int = 10) -> list[Theme]:
+    return [Theme.objects.create(name=f"benchmark-{i}") for i in range(count)]
+
+
+def make_videos(count: int, themes: list[Theme]) -> list[Video]:
+    """
+    Make `count` synthetic (unsaved) videos, spread over the given themes and a few channels.
+    """
+    return [
+        Video(
+            theme=random.choice(themes),
+            youtube_id="".join(random.choices(string.ascii_letters + string.digits, k=11)),
+            title="Benchmark video",
+            channel_name=f"channel-{random.randrange(1000)}",
+            language_code=random.choice(LANGUAGE_CODES),
+            duration=random.choice([None, random.randrange(10, 7200)]),
+            view_count=random.choice([None, int(random.paretovariate(1) * 100)]),
+            published_at=datetime.now(UTC) - timedelta(days=random.uniform(0, 5000)),
+        )
+        for _ in range(count)
+    ]
+
+
+def seed_videos(count: int, themes: list[Theme]) -> None:
+    """
+    Bulk create `count` synthetic videos in DB.
+    """
+    for start in range(0, count, SEED_BATCH_SIZE):
+        Video.objects.bulk_create(
+            make_videos(min(SEED_BATCH_SIZE, count - start), themes), ignore_conflicts=True
+        )
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {Video._meta.db_table}")
+
+
+def grow_table(sizes: list[int], themes: list[Theme]) -> Iterator[int]:
+    """
+    Seed synthetic videos until the table reaches each of the given sizes, yielding each size.
+    """
+    seeded: int = Video.objects.count()
+    for size in sorted(sizes):
+        if size > seeded:
+            seed_videos(size - seeded, themes)
+            seeded = size
+        yield size
+
+
+def measure(func: Callable, repeat: int, setup: Callable | None = None) -> dict:
+    """
+    Run `func` `repeat` times and return its timings in milliseconds.
+    If given, `setup` is called before each run (out of the timing) and its result passed to `func`.
+    """
+    timings: list[float] = []
+    for _ in range(repeat):
+        args: tuple = (setup(),) if setup else ()
+        start: float = time.perf_counter()
+        func(*args)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "p50": statistics.median(timings),
+        "p95": timings[min(int(len(timings) * 0.95), len(timings) - 1)],
+        "max": timings[-1],
+    }
+
+
+def load_random_video(**filters) -> Video | None:
+    """
+    The former way of picking a random video, loading all the candidates.
+    """
+    candidates: list[Video] = list(filter_videos(**filters))
+    return random.choice(candidates) if candidates else None
+
+
+def bench_random_video(sizes: list[int], repeat: int) -> list[dict]:
+    """
+    Pick random videos with the random key sampler and with the former whole table loading,
+    with and without filters, as the table grows.
+    """
+    themes: list[Theme] = create_themes()
+    results: list[dict] = []
+    for size in grow_table(sizes, themes):
+        theme: Theme = random.choice(themes)
+        cases: dict[str, Callable] = {
+            "sampler": pick_random_video,
+            "sampler (theme + duration)": functools.partial(
+                pick_random_video, theme=theme, min_duration=60, max_duration=600
+            ),
+            "whole table": load_random_video,
+            "whole table (theme + duration)": functools.partial(
+                load_random_video, theme=theme, min_duration=60, max_duration=600
+            ),
+        }
+        for name, func in cases.items():
+            results.append({"benchmark": name, "rows": size, **measure(func, repeat)})
+    return results
+
+
+def save_videos_one_by_one(videos: list[Video]) -> None:
+    """
+    The former way of populating the DB, saving videos one by one and skipping duplicates on
+    IntegrityError. Each save gets its own savepoint, as the benchmarks run in a transaction.
+    """
+    for video in videos:
+        try:
+            with transaction.atomic():
+                video.save()
+        except IntegrityError:
+            pass
+
+
+def bench_populate_db(sizes: list[int], repeat: int) -> list[dict]:
+    """
+    Save a YouTube search result of 50 videos with the bulk upsert and with the former one by one
+    saving, when the videos are new and when they are already in DB.
+    """
+    themes: list[Theme] = create_themes()
+    results: list[dict] = []
+    for size in grow_table(sizes, themes):
+
+        def already_saved_videos() -> list[Video]:
+            youtube_ids = Video.objects.filter(random_key__gte=random.random() * 0.9).values_list(
+                "youtube_id", flat=True
+            )[:YOUTUBE_SEARCH_SIZE]
+            return [Video(youtube_id=youtube_id, theme=themes[0]) for youtube_id in youtube_ids]
+
+        def new_videos() -> list[Video]:
+            return make_videos(YOUTUBE_SEARCH_SIZE, themes)
+
+        cases: dict[str, tuple[Callable, Callable]] = {
+            "bulk upsert (new videos)": (async_to_sync(populate_db), new_videos),
+            "save() loop (new videos)": (save_videos_one_by_one, new_videos),
+            "bulk upsert (already in DB)": (async_to_sync(populate_db), already_saved_videos),
+            "save() loop (already in DB)": (save_videos_one_by_one, already_saved_videos),
+        }
+        for name, (func, setup) in cases.items():
+            results.append({"benchmark": name, "rows": size, **measure(func, repeat, setup)})
+    return results
+
+
+def get_used_indexes(queryset: QuerySet) -> str:
+    """
+    Get the names of the indexes in the query plan of the given queryset ("seq scan" if none).
+    """
+    plan: str = queryset.explain()
+    indexes: list[str] = re.findall(r"using (?:covering )?index (?:only )?(\w+)", plan, re.I)
+    return ", ".join(dict.fromkeys(indexes)) or "seq scan"
+
+
+def sample_videos(**filters) -> QuerySet[Video]:
+    return (
+        filter_videos(**filters).filter(random_key__gte=random.random()).order_by("random_key")[:1]
+    )
+
+
+def get_latest_videos(published_after: datetime) -> QuerySet[Video]:
+    return Video.objects.filter(published_at__gte=published_after).order_by("-published_at")[:50]
+
+
+def bench_filter_paths(sizes: list[int], repeat: int) -> list[dict]:
+    """
+    Run the queries of the filtered endpoints (their first random key seek, see `sampling.py`),
+    along with the indexes their query plans use. Best run with about a million rows.
+    """
+    themes: list[Theme] = create_themes()
+    results: list[dict] = []
+    for size in grow_table(sizes, themes):
+        theme: Theme = random.choice(themes)
+        channel_name: str = f"channel-{random.randrange(1000)}"
+        published_after: datetime = datetime.now(UTC) - timedelta(days=30)
+        cases: dict[str, Callable[[], QuerySet]] = {
+            "theme": functools.partial(sample_videos, theme=theme),
+            "channel": functools.partial(sample_videos, channel_name=channel_name),
+            "language": functools.partial(sample_videos, language_code="fr"),
+            "duration": functools.partial(sample_videos, min_duration=60, max_duration=120),
+            "theme + duration": functools.partial(
+                sample_videos, theme=theme, min_duration=60, max_duration=120
+            ),
+            "published after": functools.partial(get_latest_videos, published_after),
+            "view count": lambda: Video.objects.filter(view_count__gte=1_000_000)[:50],
+        }
+        for name, make_queryset in cases.items():
+            results.append(
+                {
+                    "benchmark": name,
+                    "rows": size,
+                    **measure(lambda qs: list(qs), repeat, make_queryset),
+                    "indexes": get_used_indexes(make_queryset()),
+                }
+            )
+    return results
+
+
+def bench_helpers(sizes: list[int], repeat: int) -> list[dict]:
+    """
+    Run the pure helpers on the full dictionaries and WordNet corpus, each measure being of
+    HELPER_CALLS calls (so that milliseconds read as microseconds per call), except for the
+    related words of uncached themes. They don't depend on the videos in DB, hence no rows.
+    """
+    durations: list[str] = [
+        YOUTUBE_DURATIONS[i % len(YOUTUBE_DURATIONS)] for i in range(HELPER_CALLS)
+    ]
+    themes: list[str] = [THEMES[i % len(THEMES)] for i in range(HELPER_CALLS)]
+    # Load the data out of the timings, as at startup
+    load_word_relations()
+    for index in WORD_INDEXES.values():
+        index.open()
+
+    def get_random_words(lang: str | None) -> None:
+        for _ in range(HELPER_CALLS):
+            get_random_word(lang)
+
+    cases: dict[str, tuple[Callable, Callable | None]] = {
+        "duration parsing": (
+            lambda: [convert_youtube_duration_to_seconds(d) for d in durations],
+            None,
+        ),
+        **{
+            f"random word ({lang or 'any'})": (lambda lang=lang: get_random_words(lang), None)
+            for lang in [*DICTIONNARIES, None]
+        },
+        f"related words ({len(THEMES)} themes, uncached)": (
+            lambda _: [get_related_words(theme) for theme in THEMES],
+            _get_related_words.cache_clear,
+        ),
+        "related words (cached)": (lambda: [get_related_words(theme) for theme in themes], None),
+    }
+    return [
+        {"benchmark": name, "rows": None, **measure(func, repeat, setup)}
+        for name, (func, setup) in cases.items()
+    ]
+
+
+def bench_fallback(sizes: list[int], repeat: int) -> list[dict]:
+    """
+    Pick random videos from the DB as the endpoints do when YouTube can't be called (out of quota,
+    or for the stream and batch endpoints), as the table grows.
+    """
+    themes: list[Theme] = create_themes()
+    pick = async_to_sync(apick_random_video)
+    pick_many = async_to_sync(apick_random_videos)
+    results: list[dict] = []
+    for size in grow_table(sizes, themes):
+        theme: Theme = random.choice(themes)
+        channel_name: str = f"channel-{random.randrange(1000)}"
+        cases: dict[str, Callable] = {
+            "video": pick,
+            "video (theme)": functools.partial(pick, theme=theme),
+            "video (channel)": functools.partial(pick, channel_name=channel_name),
+            "video (theme + duration)": functools.partial(
+                pick, theme=theme, min_duration=60, max_duration=600
+            ),
+            "10 videos (theme)": functools.partial(pick_many, 10, theme=theme),
+            "10 videos (theme, seeded)": functools.partial(pick_many, 10, seed=42, theme=theme),
+        }
+        for name, func in cases.items():
+            results.append({"benchmark": name, "rows": size, **measure(func, repeat)})
+    return results
+
+
+BENCHMARKS: dict[str, Callable[[list[int], int], list[dict]]] = {
+    "helpers": bench_helpers,
+    "random_video": bench_random_video,
+    "populate_db": bench_populate_db,
+    "filter_paths": bench_filter_paths,
+    "fallback": bench_fallback,
+}
+
+
+def get_baseline_key(name: str, result: dict) -> str:
+    return f"{name}/{result['benchmark']}/{result['rows'] or '-'}"
+
+
+def load_baseline(path: str) -> dict[str, dict]:
+    """
+    Load the results saved by `save_baseline`, by `get_baseline_key`.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def save_baseline(path: str, results: dict[str, dict]) -> None:
+    """
+    Save the given results over those of the baseline file, keeping the results of the benchmarks
+    which weren't run.
+    """
+    baseline: dict[str, dict] = load_baseline(path)
+    baseline.update(results)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(
+            {"saved_at": datetime.now(UTC).isoformat(), "results": dict(sorted(baseline.items()))},
+            f,
+            indent=2,
+            ensure_ascii=False,
+        )
+
+
+def is_regression(result: dict, baseline: dict, threshold: float) -> bool:
+    """
+    Whether the median timing of a result exceeds that of its baseline by more than `threshold`
+    (e.g. 0.2 for 20%).
+    """
+    delta: float = result["p50"] - baseline["p50"]
+    return delta > REGRESSION_MIN_DELTA and delta > baseline["p50"] * threshold
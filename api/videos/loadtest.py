@@ -0,0 +1,212 @@
+"""
+Load test of the API endpoints, run with `./manage.py load_test`.
+It runs either in-process, against the Django application with the YouTube API stub, counting the
+DB queries of each endpoint, or against a running server (e.g. gunicorn, started with
+YOUTUBE_API_URL pointing at `./manage.py youtube_stub_server`), for realistic concurrency.
+"""
+
+import asyncio
+import contextvars
+import random
+import statistics
+import time
+from collections import Counter, defaultdict
+from collections.abc import Callable
+from urllib.parse import quote
+
+import httpx
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient
+
+from videos.api.utils.youtube_stub import STUB_CHANNEL_COUNT
+from vj_api.settings import METRICS_TOKEN
+
+LANGUAGE_CODES: list[str] = ["en", "fr", "ja"]
+LOAD_TEST_THEME = "load test"  # requested when there are no themes yet
+LOAD_TEST_CHANNEL_PREFIX = "load-test-"  # handles of the channels requested
+
+# Paths of the requests of each endpoint of videos/api/router.py, given the test data
+ROUTES: dict[str, Callable[[dict], str]] = {
+    "random": lambda data: "/api/videos/",
+    "batch": lambda data: (
+        f"/api/videos/batch?count=10&theme={quote(random.choice(data['themes']))}"
+    ),
+    "themes": lambda data: "/api/videos/themes",
+    "video": lambda data: f"/api/videos/video/{random.choice(data['youtube_ids'])}",
+    "theme": lambda data: f"/api/videos/theme/{quote(random.choice(data['themes']))}",
+    "channel": lambda data: (
+        f"/api/videos/channel/{LOAD_TEST_CHANNEL_PREFIX}{random.randrange(STUB_CHANNEL_COUNT)}"
+    ),
+    "language": lambda data: f"/api/videos/language/{random.choice(LANGUAGE_CODES)}",
+    "duration": lambda data: "/api/videos/duration?min_minutes=1&max_minutes=10",
+    "shuffle": lambda data: f"/api/videos/shuffle?theme={quote(random.choice(data['themes']))}",
+    "stream": lambda data: "/api/videos/stream?format=ndjson&ahead=1",
+    "stats/youtube-cache": lambda data: "/api/videos/stats/youtube-cache",
+    "stats/youtube-quota": lambda data: "/api/videos/stats/youtube-quota",
+}
+STREAMED_ROUTES: set[str] = {"stream"}
+# To read the stats routes, which are restricted like the metrics
+HEADERS: dict[str, str] = {"Authorization": f"Bearer {METRICS_TOKEN}"} if METRICS_TOKEN else {}
+
+current_route: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "current_route", default=None
+)
+
+
+class QueryCounter:
+    """
+    Counter of the DB queries run by the requests of each route, from every thread.
+    The route is known from a context variable, which asgiref copies to the threads running the
+    sync parts of the requests (such as the ORM calls).
+    """
+
+    def __init__(self) -> None:
+        self.counts: Counter[str] = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        route: str | None = current_route.get()
+        if route:
+            self.counts[route] += 1
+        return execute(sql, params, many, context)
+
+    def install(self) -> None:
+        for connection in connections.all(initialized_only=True):
+            self.add_to(connection)
+        connection_created.connect(self.on_connection_created, weak=False)
+
+    def on_connection_created(self, sender, connection, **kwargs) -> None:
+        self.add_to(connection)
+
+    def add_to(self, connection) -> None:
+        # A pooled connection sends connection_created each time it is taken from the pool
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+
+class InProcessClient:
+    """
+    Requests to the Django application, in this process.
+    """
+
+    def __init__(self) -> None:
+        self.client = AsyncClient(headers=HEADERS)
+
+    async def get(self, path: str, streamed: bool = False) -> int:
+        response = await self.client.get(path)
+        if streamed and response.status_code == 200:
+            # Only the first event: the stream lasts until VIDEO_STREAM_MAX_DURATION
+            content = response.streaming_content
+            async for _ in content:
+                break
+            await content.aclose()
+        return response.status_code
+
+    async def aclose(self) -> None:
+        pass
+
+
+class HttpClient:
+    """
+    Requests to a running server.
+    """
+
+    def __init__(self, base_url: str, concurrency: int) -> None:
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            headers=HEADERS,
+            timeout=60,
+            limits=httpx.Limits(max_connections=concurrency),
+        )
+
+    async def get(self, path: str, streamed: bool = False) -> int:
+        if not streamed:
+            return (await self.client.get(path)).status_code
+        async with self.client.stream("GET", path) as response:
+            if response.status_code == 200:
+                async for _ in response.aiter_lines():
+                    break
+            return response.status_code
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+async def get_test_data(client: InProcessClient | HttpClient) -> dict:
+    """
+    Get the themes and some video IDs to request, from the API itself.
+    """
+    themes: dict = (await client.client.get("/api/videos/themes")).json()
+    batch = await client.client.get("/api/videos/batch?count=50")
+    return {
+        "themes": [theme["name"] for theme in themes.get("themes", [])] or [LOAD_TEST_THEME],
+        "youtube_ids": [video["youtubeId"] for video in batch.json()["videos"]]
+        if batch.status_code == 200
+        else [],
+    }
+
+
+async def run_load_test(
+    client: InProcessClient | HttpClient,
+    routes: list[str],
+    requests: int,
+    concurrency: int,
+    query_counter: QueryCounter | None = None,
+) -> dict:
+    """
+    Send `requests` requests spread over the given routes, `concurrency` at a time, and return
+    their timings (in milliseconds) and status codes per route, and the total duration.
+    """
+    data: dict = await get_test_data(client)
+    if not data["youtube_ids"]:
+        # Nothing cached yet: the video details route would only answer 404s
+        data["youtube_ids"] = ["unknown"]
+    timings: defaultdict[str, list[float]] = defaultdict(list)
+    statuses: defaultdict[str, Counter[int]] = defaultdict(Counter)
+    remaining: int = requests
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            route: str = random.choice(routes)
+            current_route.set(route)
+            start: float = time.perf_counter()
+            try:
+                status_code: int = await client.get(
+                    ROUTES[route](data), streamed=route in STREAMED_ROUTES
+                )
+            except httpx.HTTPError:
+                status_code = 0
+            timings[route].append((time.perf_counter() - start) * 1000)
+            statuses[route][status_code] += 1
+            current_route.set(None)
+
+    start: float = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    duration: float = time.perf_counter() - start
+    return {
+        "duration": duration,
+        "routes": [
+            summarize(route, timings[route], statuses[route], query_counter)
+            for route in routes
+            if timings[route]
+        ],
+    }
+
+
+def summarize(
+    route: str, timings: list[float], statuses: Counter[int], query_counter: QueryCounter | None
+) -> dict:
+    timings = sorted(timings)
+    count: int = len(timings)
+    return {
+        "route": route,
+        "requests": count,
+        "errors": sum(n for status_code, n in statuses.items() if not 200 <= status_code < 500),
+        "statuses": dict(sorted(statuses.items())),
+        "p50": statistics.median(timings),
+        "p95": timings[min(int(count * 0.95), count - 1)],
+        "p99": timings[min(int(count * 0.99), count - 1)],
+        "queries": query_counter.counts[route] / count if query_counter else None,
+    }
@@ -0,0 +1,117 @@
+import asyncio
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from videos.api.utils.youtube import YOUTUBE_MAX_IDS, update_videos_details
+from videos.api.utils.youtube_cache import YouTubeCache
+from videos.api.utils.youtube_client import (
+    YouTubeClient,
+    YouTubeError,
+    set_youtube_client,
+)
+from videos.api.utils.youtube_stub import RecordedYouTubeResponses
+from videos.models import Video
+from vj_api.settings import BASE_DIR
+
+DEFAULT_PROGRESS_FILE: str = os.path.join(BASE_DIR, "cache/backfill_videos.json")
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill in the missing duration, view count, publication date and description of the "
+        "videos in DB, 50 videos per YouTube call. Progress is saved after each chunk, so that "
+        "an interrupted backfill resumes where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rate", type=float, default=1, help="Maximum YouTube calls per second"
+        )
+        parser.add_argument("--limit", type=int, help="Maximum number of videos to scan")
+        parser.add_argument(
+            "--progress-file", default=DEFAULT_PROGRESS_FILE, help="Where progress is saved"
+        )
+        parser.add_argument(
+            "--restart", action="store_true", help="Ignore the saved progress and start over"
+        )
+        parser.add_argument(
+            "--responses",
+            help="JSON file of recorded `videos.list` items to use instead of the YouTube API",
+        )
+
+    def handle(self, *args, **options):
+        if options["rate"] <= 0:
+            raise CommandError("--rate must be positive")
+        asyncio.run(self.backfill(**options))
+
+    async def backfill(self, **options) -> None:
+        if options["responses"]:
+            stub = RecordedYouTubeResponses.from_file(options["responses"])
+            set_youtube_client(
+                YouTubeClient(
+                    api_key="stub",
+                    transport=stub.transport(),
+                    cache=YouTubeCache(ttl=0, max_entries=0),
+                    scheduler=None,
+                )
+            )
+
+        progress: dict = {"last_pk": 0, "scanned": 0, "updated": 0}
+        if not options["restart"] and os.path.exists(options["progress_file"]):
+            with open(options["progress_file"]) as f:
+                progress = json.load(f)
+            self.stdout.write(f"Resuming after video {progress['last_pk']}")
+
+        videos = Video.objects.filter(
+            Q(duration__isnull=True)
+            | Q(view_count__isnull=True)
+            | Q(published_at__isnull=True)
+            | Q(description__isnull=True)
+        ).order_by("pk")
+        interval: float = 1 / options["rate"]
+        next_call: float = time.monotonic()
+        scanned = 0
+        while options["limit"] is None or scanned < options["limit"]:
+            size: int = YOUTUBE_MAX_IDS
+            if options["limit"] is not None:
+                size = min(size, options["limit"] - scanned)
+            # Keyset pagination: no OFFSET, each chunk is an index range scan from the last pk
+            chunk: list[Video] = [v async for v in videos.filter(pk__gt=progress["last_pk"])[:size]]
+            if not chunk:
+                break
+
+            await asyncio.sleep(max(next_call - time.monotonic(), 0))
+            next_call = max(next_call, time.monotonic()) + interval
+            try:
+                updated_videos: list[Video] = await update_videos_details(chunk)
+            except YouTubeError as e:
+                # e.g. no quota left: stop there, the next run resumes from this chunk
+                message: str = f"Stopped after video {progress['last_pk']}: {e.message}"
+                raise CommandError(message) from e
+
+            scanned += len(chunk)
+            progress["last_pk"] = chunk[-1].pk
+            progress["scanned"] += len(chunk)
+            progress["updated"] += len(updated_videos)
+            self.save_progress(options["progress_file"], progress)
+            self.stdout.write(
+                f"Videos up to {progress['last_pk']}: {len(updated_videos)}/{len(chunk)} updated"
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{progress['updated']} of {progress['scanned']} scanned videos updated"
+            )
+        )
+
+    def save_progress(self, path: str, progress: dict) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first, so that an interruption can't corrupt the progress
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(progress, f)
+        os.replace(tmp_path, path)
@@ -0,0 +1,98 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from videos.benchmarks import (
+    BENCHMARKS,
+    get_baseline_key,
+    is_regression,
+    load_baseline,
+    save_baseline,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the API hot paths against growing numbers of synthetic videos. "
+        "The synthetic videos are rolled back at the end. With --baseline, the results are "
+        "compared to those of a previous run, and the command fails on regressions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "benchmarks",
+            nargs="*",
+            help=f"Benchmarks to run among {', '.join(BENCHMARKS)} (all by default)",
+        )
+        parser.add_argument(
+            "--rows",
+            nargs="+",
+            type=int,
+            default=[1_000, 10_000, 100_000],
+            help="Numbers of videos in the table to run the benchmarks with",
+        )
+        parser.add_argument("--repeat", type=int, default=50, help="Runs per measure")
+        parser.add_argument(
+            "--baseline",
+            help="JSON file of results to compare to (timings only compare on the same machine)",
+        )
+        parser.add_argument(
+            "--save-baseline",
+            action="store_true",
+            help="Save the results in the --baseline file, instead of comparing to it",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Slowdown of the median timing counted as a regression, e.g. 0.2 for 20%%",
+        )
+
+    def handle(self, *args, **options):
+        names: list[str] = options["benchmarks"] or list(BENCHMARKS)
+        for name in names:
+            if name not in BENCHMARKS:
+                raise CommandError(f'Unknown benchmark "{name}"')
+        if options["save_baseline"] and not options["baseline"]:
+            raise CommandError("--save-baseline needs a --baseline file")
+        baseline: dict[str, dict] = (
+            load_baseline(options["baseline"])
+            if options["baseline"] and not options["save_baseline"]
+            else {}
+        )
+        results: dict[str, dict] = {}
+        regressions: list[str] = []
+        for name in names:
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(
+                f"{'case':<36}{'rows':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}"
+                + (f"{'vs base':>10}" if baseline else "")
+            )
+            with transaction.atomic():
+                for result in BENCHMARKS[name](options["rows"], options["repeat"]):
+                    key: str = get_baseline_key(name, result)
+                    results[key] = {"p50": result["p50"], "p95": result["p95"]}
+                    line: str = (
+                        f"{result['benchmark']:<36}{result['rows'] or '-':>10}"
+                        f"{result['p50']:>10.2f}{result['p95']:>10.2f}{result['max']:>10.2f}"
+                    )
+                    if key in baseline:
+                        change: float = result["p50"] / baseline[key]["p50"] - 1
+                        line += f"{change:>+10.0%}"
+                        if is_regression(result, baseline[key], options["threshold"]):
+                            regressions.append(key)
+                            line = self.style.ERROR(line)
+                    elif baseline:
+                        line += f"{'new':>10}"
+                    self.stdout.write(
+                        line + (f"  {result['indexes']}" if "indexes" in result else "")
+                    )
+                transaction.set_rollback(True)
+
+        if options["save_baseline"]:
+            save_baseline(options["baseline"], results)
+            self.stdout.write(f"Saved the results in {options['baseline']}")
+        if regressions:
+            raise CommandError(
+                f"{len(regressions)} regression(s) beyond {options['threshold']:.0%} of the "
+                f"baseline: {', '.join(regressions)}"
+            )
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from videos.api.utils.dictionary import WORD_INDEXES
+
+
+class Command(BaseCommand):
+    help = "Build the offsets files used to pick random words from the dictionaries."
+
+    def handle(self, *args, **options):
+        for lang, index in WORD_INDEXES.items():
+            count: int = index.build()
+            self.stdout.write(f'{lang}: {count} words indexed in "{index.index_path}"')
@@ -0,0 +1,68 @@
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from videos.api.utils.versions import VIDEOS, bump_data_version
+from videos.models import Video
+from vj_api.helpers import compute_best_starts
+
+
+class Command(BaseCommand):
+    help = (
+        "Guess where each video gets interesting (after its intro chapters, or a share of its "
+        "duration) and save it as its best start. Chunks of videos are computed in a process pool."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all", action="store_true", help="Recompute the best start of all the videos"
+        )
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Videos per chunk")
+        parser.add_argument(
+            "--workers", type=int, default=os.cpu_count(), help="Number of worker processes"
+        )
+
+    def handle(self, *args, **options):
+        videos = Video.objects.filter(duration__isnull=False).order_by("pk")
+        if not options["all"]:
+            videos = videos.filter(best_start__isnull=True)
+        chunk_size: int = options["chunk_size"]
+
+        def get_chunks():
+            # Keyset pagination over the primary key
+            last_pk = 0
+            while True:
+                chunk = list(
+                    videos.filter(pk__gt=last_pk).values_list("pk", "duration", "description")[
+                        :chunk_size
+                    ]
+                )
+                if not chunk:
+                    return
+                last_pk = chunk[-1][0]
+                yield chunk
+
+        updated = 0
+        workers: int = options["workers"] or 1
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Bounded number of chunks in flight, as `executor.map` would read the whole table
+            pending: deque[Future] = deque()
+            for chunk in get_chunks():
+                pending.append(executor.submit(compute_best_starts, chunk))
+                if len(pending) >= 2 * workers:
+                    updated += self.save(pending.popleft().result(), chunk_size)
+            while pending:
+                updated += self.save(pending.popleft().result(), chunk_size)
+        bump_data_version(VIDEOS)
+        self.stdout.write(self.style.SUCCESS(f"Best start of {updated} videos saved"))
+
+    def save(self, best_starts: list[tuple[int, int | None]], batch_size: int) -> int:
+        Video.objects.bulk_update(
+            [Video(pk=pk, best_start=best_start) for pk, best_start in best_starts],
+            fields=["best_start"],
+            batch_size=batch_size,
+        )
+        self.stdout.write(f"Best start of {len(best_starts)} videos saved")
+        return len(best_starts)
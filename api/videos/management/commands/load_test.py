@@ -0,0 +1,173 @@
+import asyncio
+
+import httpx
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from videos.api.utils.pool import video_pool
+from videos.api.utils.youtube_cache import MemoryYouTubeCache
+from videos.api.utils.youtube_client import YouTubeClient, set_youtube_client
+from videos.api.utils.youtube_stub import STUB_VIDEO_ID_PREFIX, FakeYouTubeAPI
+from videos.loadtest import (
+    LOAD_TEST_CHANNEL_PREFIX,
+    LOAD_TEST_THEME,
+    ROUTES,
+    HttpClient,
+    InProcessClient,
+    QueryCounter,
+    run_load_test,
+)
+from videos.models import Channel, Theme, Video
+from vj_api.settings import YOUTUBE_CACHE_MAX_ENTRIES, YOUTUBE_CACHE_TTL
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test the API endpoints and report their latency percentiles. By default, the "
+        "requests are made in-process with a stub of the YouTube API, counting their DB queries, "
+        "and the fake videos and channels they save in DB are deleted at the end. With --url, "
+        "they are sent to a running server instead (see the youtube_stub_server command)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "routes",
+            nargs="*",
+            help=f"Routes to request among {', '.join(ROUTES)} (all by default)",
+        )
+        parser.add_argument("--requests", type=int, default=1000, help="Number of requests")
+        parser.add_argument("--concurrency", type=int, default=20, help="Requests at a time")
+        parser.add_argument(
+            "--url", help="Base URL of a running server, e.g. http://localhost:8000"
+        )
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=0.1,
+            help="In-process: mean duration of a YouTube API stub call, in seconds",
+        )
+        parser.add_argument(
+            "--error-rate",
+            type=float,
+            default=0,
+            help="In-process: share of the YouTube API stub calls failing with a 503",
+        )
+        parser.add_argument(
+            "--quota-error-rate",
+            type=float,
+            default=0,
+            help="In-process: share of the YouTube API stub calls failing with a 403 quota error",
+        )
+        parser.add_argument(
+            "--keep-data",
+            action="store_true",
+            help="In-process: keep the fake videos and channels saved in DB",
+        )
+
+    def handle(self, *args, **options):
+        routes: list[str] = options["routes"] or list(ROUTES)
+        for route in routes:
+            if route not in ROUTES:
+                raise CommandError(f'Unknown route "{route}"')
+        if options["requests"] < 1 or options["concurrency"] < 1:
+            raise CommandError("--requests and --concurrency must be positive")
+
+        youtube_api: FakeYouTubeAPI | None = None
+        deleted_videos: int | None = None
+        query_counter: QueryCounter | None = None
+        if options["url"]:
+            results: dict = asyncio.run(
+                self.run_against_server(
+                    options["url"], routes, options["requests"], options["concurrency"]
+                )
+            )
+        else:
+            youtube_api = FakeYouTubeAPI(
+                latency=options["latency"],
+                error_rate=options["error_rate"],
+                quota_error_rate=options["quota_error_rate"],
+            )
+            query_counter = QueryCounter()
+            query_counter.install()
+            had_themes: bool = Theme.objects.exists()
+            # Lets the test client requests in (ALLOWED_HOSTS)
+            setup_test_environment()
+            try:
+                results = asyncio.run(
+                    self.run_in_process(
+                        youtube_api,
+                        query_counter,
+                        routes,
+                        options["requests"],
+                        options["concurrency"],
+                    )
+                )
+            finally:
+                teardown_test_environment()
+                if not options["keep_data"]:
+                    deleted_videos = self.delete_fake_data(delete_theme=not had_themes)
+
+        self.stdout.write(
+            f"{'route':<22}{'requests':>10}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+            + (f"{'queries':>10}" if query_counter else "")
+        )
+        for result in results["routes"]:
+            self.stdout.write(
+                f"{result['route']:<22}{result['requests']:>10}{result['errors']:>8}"
+                f"{result['p50']:>10.1f}{result['p95']:>10.1f}{result['p99']:>10.1f}"
+                + (f"{result['queries']:>10.1f}" if query_counter else "")
+                + f"  {result['statuses']}"
+            )
+        self.stdout.write(
+            f"{options['requests']} requests in {results['duration']:.1f} s "
+            f"({options['requests'] / results['duration']:.0f} requests/s)"
+        )
+        if youtube_api:
+            self.stdout.write(f"YouTube API stub calls: {youtube_api.calls}")
+        if deleted_videos is not None:
+            self.stdout.write(f"Deleted the {deleted_videos} fake videos saved in DB")
+
+    async def run_against_server(
+        self, url: str, routes: list[str], requests: int, concurrency: int
+    ) -> dict:
+        client = HttpClient(url, concurrency)
+        try:
+            return await run_load_test(client, routes, requests, concurrency)
+        except httpx.HTTPError as e:
+            raise CommandError(f"Couldn't request the server at {url}: {str(e)}") from e
+        finally:
+            await client.aclose()
+
+    async def run_in_process(
+        self,
+        youtube_api: FakeYouTubeAPI,
+        query_counter: QueryCounter,
+        routes: list[str],
+        requests: int,
+        concurrency: int,
+    ) -> dict:
+        # One client for the requests, and one for the pool refills, which have their own loop
+        for loop in [asyncio.get_running_loop(), video_pool.get_loop()]:
+            set_youtube_client(
+                YouTubeClient(
+                    api_key="stub",
+                    transport=youtube_api.transport(),
+                    cache=MemoryYouTubeCache(
+                        ttl=YOUTUBE_CACHE_TTL, max_entries=YOUTUBE_CACHE_MAX_ENTRIES
+                    ),
+                    scheduler=None,
+                    lock_dir=None,
+                ),
+                loop=loop,
+            )
+        return await run_load_test(
+            InProcessClient(), routes, requests, concurrency, query_counter=query_counter
+        )
+
+    @staticmethod
+    def delete_fake_data(delete_theme: bool) -> int:
+        videos, _ = Video.objects.filter(youtube_id__startswith=STUB_VIDEO_ID_PREFIX).delete()
+        Channel.objects.filter(name__startswith=LOAD_TEST_CHANNEL_PREFIX).delete()
+        if delete_theme:
+            Theme.objects.filter(name=LOAD_TEST_THEME).delete()
+        return videos
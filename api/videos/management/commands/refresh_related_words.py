@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from videos.api.utils.versions import THEMES, bump_data_version
+from videos.models import Theme
+from vj_api.helpers import get_related_words, load_word_relations
+
+
+class Command(BaseCommand):
+    help = "Compute the WordNet related words of the themes which don't have them yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all", action="store_true", help="Recompute the related words of all the themes"
+        )
+
+    def handle(self, *args, **options):
+        if not load_word_relations():
+            raise CommandError("The word relations data can't be loaded")
+        themes = Theme.objects.all()
+        if not options["all"]:
+            themes = themes.filter(related_words__isnull=True)
+        updated_themes: list[Theme] = []
+        for theme in themes:
+            theme.related_words = get_related_words(theme.name)
+            updated_themes.append(theme)
+        Theme.objects.bulk_update(updated_themes, fields=["related_words"])
+        bump_data_version(THEMES)
+        self.stdout.write(f"Related words of {len(updated_themes)} themes refreshed")
@@ -0,0 +1,69 @@
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import orjson
+from django.core.management.base import BaseCommand
+
+from videos.api.utils.youtube_stub import FakeYouTubeAPI
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve a stub of the YouTube Data API making up videos and channels, to run the API "
+        "without network nor quota (e.g. to load test it). Start the API with YOUTUBE_API_URL "
+        "set to http://<host>:<port>/youtube/v3/ to use it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8081)
+        parser.add_argument(
+            "--latency", type=float, default=0.1, help="Mean duration of a call, in seconds"
+        )
+        parser.add_argument(
+            "--error-rate", type=float, default=0, help="Share of the calls failing with a 503"
+        )
+        parser.add_argument(
+            "--quota-error-rate",
+            type=float,
+            default=0,
+            help='Share of the calls failing with a 403 "quotaExceeded"',
+        )
+        parser.add_argument("--pages", type=int, default=5, help="Pages of results per search")
+
+    def handle(self, *args, **options):
+        api = FakeYouTubeAPI(
+            latency=options["latency"],
+            error_rate=options["error_rate"],
+            quota_error_rate=options["quota_error_rate"],
+            pages=options["pages"],
+        )
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                time.sleep(api.get_latency())
+                url = urlsplit(self.path)
+                resource: str = url.path.rstrip("/").rsplit("/", 1)[-1]
+                status_code, content = api.respond(resource, dict(parse_qsl(url.query)))
+                body: bytes = orjson.dumps(content)
+                self.send_response(status_code)
+                self.send_header("Content-Type", "application/json; charset=UTF-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:
+                pass  # one line per call would flood the output of a load test
+
+        server = ThreadingHTTPServer((options["host"], options["port"]), RequestHandler)
+        self.stdout.write(
+            f"YouTube API stub listening on http://{options['host']}:{options['port']}/youtube/v3/"
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"Calls: {api.calls}")
@@ -0,0 +1,87 @@
+import hashlib
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.http import HttpRequest, HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+
+from videos.api.utils.versions import THEMES, VIDEOS, aget_data_version, get_data_version
+from vj_api.settings import VERSION
+
+# Deterministic endpoints, whose responses only depend on their URL and the version of their data:
+# (path, query parameter they must have to be deterministic, data version scope, max age in seconds)
+CACHEABLE_ENDPOINTS: list[tuple[re.Pattern, str | None, str, int]] = [
+    (re.compile(r"^/api/videos/themes$"), None, THEMES, 300),
+    (re.compile(r"^/api/videos/video/[\w-]+$"), None, VIDEOS, 3600),
+    (re.compile(r"^/api/videos/batch$"), "seed", VIDEOS, 60),
+]
+
+
+class CacheableResponsesMiddleware:
+    """
+    Cache-Control and ETag headers for the responses of the deterministic endpoints.
+    As their ETag is derived from the data version rather than from the content, a request with
+    a matching If-None-Match gets a 304 straight away, without running the view nor the DB queries.
+    """
+
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        endpoint: tuple | None = self.get_endpoint(request)
+        if not endpoint:
+            return self.get_response(request)
+        etag: str = self.make_etag(request, get_data_version(endpoint[2]))
+        if self.is_not_modified(request, etag):
+            return self.add_headers(HttpResponseNotModified(), etag, endpoint)
+        return self.add_headers(self.get_response(request), etag, endpoint)
+
+    async def __acall__(self, request: HttpRequest):
+        endpoint: tuple | None = self.get_endpoint(request)
+        if not endpoint:
+            return await self.get_response(request)
+        etag: str = self.make_etag(request, await aget_data_version(endpoint[2]))
+        if self.is_not_modified(request, etag):
+            return self.add_headers(HttpResponseNotModified(), etag, endpoint)
+        return self.add_headers(await self.get_response(request), etag, endpoint)
+
+    @staticmethod
+    def get_endpoint(request: HttpRequest) -> tuple | None:
+        if request.method not in ("GET", "HEAD"):
+            return None
+        for endpoint in CACHEABLE_ENDPOINTS:
+            path, required_parameter = endpoint[0], endpoint[1]
+            if path.match(request.path) and (
+                not required_parameter or required_parameter in request.GET
+            ):
+                return endpoint
+        return None
+
+    @staticmethod
+    def make_etag(request: HttpRequest, data_version: int) -> str:
+        # The app version changes the ETags too, as a release may change the responses
+        key: str = f"{VERSION}:{data_version}:{request.get_full_path()}"
+        return f'"{hashlib.sha1(key.encode()).hexdigest()[:20]}"'
+
+    @staticmethod
+    def is_not_modified(request: HttpRequest, etag: str) -> bool:
+        if_none_match: str | None = request.headers.get("If-None-Match")
+        if not if_none_match:
+            return False
+        etags: list[str] = parse_etags(if_none_match)
+        return "*" in etags or etag in etags
+
+    @staticmethod
+    def add_headers(response: HttpResponse, etag: str, endpoint: tuple) -> HttpResponse:
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            patch_cache_control(response, public=True, max_age=endpoint[3])
+        return response
@@ -0,0 +1,27 @@
+import random
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("videos", "0012_video_language_code_video_published_at_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="video",
+            name="random_key",
+            field=models.FloatField(editable=False, null=True),
+        ),
+        # Give each existing video its own random key (a callable default is only evaluated once)
+        migrations.RunSQL(
+            "UPDATE videos SET random_key = random() WHERE random_key IS NULL",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AlterField(
+            model_name="video",
+            name="random_key",
+            field=models.FloatField(db_index=True, default=random.random, editable=False),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("videos", "0013_video_random_key"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Channel",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("name", models.CharField(max_length=255, unique=True)),
+                ("youtube_id", models.CharField(db_index=True, max_length=32)),
+                ("title", models.CharField(max_length=255, null=True)),
+                ("uploads_playlist_id", models.CharField(max_length=64, null=True)),
+                ("created", models.DateTimeField(auto_now_add=True, null=True)),
+            ],
+            options={
+                "db_table": "channels",
+            },
+        ),
+    ]
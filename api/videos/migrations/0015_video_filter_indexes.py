@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("videos", "0014_channel"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="video",
+            index=models.Index(fields=["theme", "random_key"], name="videos_theme_random_key_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="video",
+            index=models.Index(
+                fields=["channel_name", "random_key"], name="videos_channel_random_key_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="video",
+            index=models.Index(
+                fields=["language_code", "random_key"], name="videos_language_random_key_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="video",
+            index=models.Index(
+                condition=models.Q(("duration__isnull", False)),
+                fields=["duration"],
+                name="videos_duration_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="video",
+            index=models.Index(
+                condition=models.Q(("duration__isnull", False)),
+                fields=["theme", "duration"],
+                name="videos_theme_duration_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="video",
+            index=models.Index(fields=["published_at"], name="videos_published_at_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="video",
+            index=models.Index(fields=["view_count"], name="videos_view_count_idx"),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("videos", "0015_video_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="theme",
+            name="related_words",
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+    ]
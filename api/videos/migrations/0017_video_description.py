@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("videos", "0016_theme_related_words"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="video",
+            name="description",
+            field=models.TextField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_themes(apps, schema_editor) -> None:
+    """
+    Merge the themes created more than once with the same name into the oldest one.
+    """
+    Theme = apps.get_model("videos", "Theme")
+    Video = apps.get_model("videos", "Video")
+    duplicates = (
+        Theme.objects.values("name")
+        .annotate(count=Count("id"), kept_id=Min("id"))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicates:
+        themes = Theme.objects.filter(name=duplicate["name"]).exclude(id=duplicate["kept_id"])
+        Video.objects.filter(theme__in=themes).update(theme_id=duplicate["kept_id"])
+        themes.delete()
+
+
+class Migration(migrations.Migration):
+    # Postgres can't alter a table with pending trigger events (of the deferred foreign key
+    # checks of the merge): the merge is committed in its own transaction first
+    atomic = False
+
+    dependencies = [
+        ("videos", "0017_video_description"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_themes, reverse_code=migrations.RunPython.noop, atomic=True
+        ),
+        migrations.AlterField(
+            model_name="theme",
+            name="name",
+            field=models.CharField(max_length=64, unique=True),
+        ),
+    ]
@@ -1,10 +1,16 @@
+import random
+
 from django.db import models
 
+from vj_api.helpers import get_related_words, load_word_relations
+
 
 class Theme(models.Model):
-    name = models.CharField(max_length=64)
+    name = models.CharField(max_length=64, unique=True)
     active = models.BooleanField(default=True)
     created = models.DateTimeField(auto_now_add=True, null=True)
+    # WordNet words related to the name, computed on save (None if not computed yet)
+    related_words = models.JSONField(null=True, blank=True, editable=False)
 
     class Meta:
         db_table = "themes"
@@ -12,12 +18,42 @@ class Theme(models.Model):
     def __str__(self) -> str:
         return f"{self.pk} - {self.name}"
 
+    def save(self, *args, **kwargs) -> None:
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "name" in update_fields:
+            # Left to compute (see the refresh_related_words command) when the data can't be loaded
+            self.related_words = get_related_words(self.name) if load_word_relations() else None
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "related_words"}
+        super().save(*args, **kwargs)
+
+    def get_related_words(self) -> list[str]:
+        if self.related_words is None:
+            return get_related_words(self.name)
+        return self.related_words
+
+
+class Channel(models.Model):
+    # Handle, ID or name the channel was requested with, lowercased (several may map to a channel)
+    name = models.CharField(max_length=255, unique=True)
+    youtube_id = models.CharField(max_length=32, db_index=True)
+    title = models.CharField(max_length=255, null=True)
+    uploads_playlist_id = models.CharField(max_length=64, null=True)
+    created = models.DateTimeField(auto_now_add=True, null=True)
+
+    class Meta:
+        db_table = "channels"
+
+    def __str__(self) -> str:
+        return f"{self.pk} - {self.name}"
+
 
 class Video(models.Model):
     theme = models.ForeignKey(Theme, on_delete=models.CASCADE, null=True)
     search_string = models.CharField(max_length=255, null=True, editable=False)
     youtube_id = models.CharField(max_length=32, unique=True, editable=False)
     title = models.CharField(max_length=255, null=True, editable=False)
+    description = models.TextField(null=True, blank=True, editable=False)
     thumbnail = models.URLField(null=True, editable=False)
     duration = models.IntegerField(null=True)  # in seconds
     best_start = models.IntegerField(null=True)
@@ -26,9 +62,34 @@ class Video(models.Model):
     view_count = models.BigIntegerField(null=True, blank=True)
     language_code = models.CharField(max_length=10, null=True, blank=True)
     published_at = models.DateTimeField(null=True, blank=True)
+    # Uniformly distributed random key, used to pick random videos with an index seek
+    random_key = models.FloatField(default=random.random, db_index=True, editable=False)
 
     class Meta:
         db_table = "videos"
+        indexes = [
+            # Random picks among the videos of a theme, channel or language (see `sampling.py`)
+            models.Index(fields=["theme", "random_key"], name="videos_theme_random_key_idx"),
+            models.Index(
+                fields=["channel_name", "random_key"], name="videos_channel_random_key_idx"
+            ),
+            models.Index(
+                fields=["language_code", "random_key"], name="videos_language_random_key_idx"
+            ),
+            # Duration ranges, only over the videos whose duration is known
+            models.Index(
+                fields=["duration"],
+                name="videos_duration_idx",
+                condition=models.Q(duration__isnull=False),
+            ),
+            models.Index(
+                fields=["theme", "duration"],
+                name="videos_theme_duration_idx",
+                condition=models.Q(duration__isnull=False),
+            ),
+            models.Index(fields=["published_at"], name="videos_published_at_idx"),
+            models.Index(fields=["view_count"], name="videos_view_count_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.pk} - {self.youtube_id}"
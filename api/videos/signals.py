@@ -0,0 +1,27 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from videos.api.utils.channels import clear_channels
+from videos.api.utils.themes import theme_registry
+from videos.api.utils.versions import THEMES, VIDEOS, bump_data_version
+from videos.models import Channel, Theme, Video
+
+
+@receiver([post_save, post_delete], sender=Theme)
+def theme_changed(sender, **kwargs) -> None:
+    theme_registry.clear()
+    bump_data_version(THEMES)
+    # Videos responses hold the name of their theme
+    bump_data_version(VIDEOS)
+
+
+@receiver([post_save, post_delete], sender=Channel)
+def channel_changed(sender, **kwargs) -> None:
+    clear_channels()
+    # Videos responses hold the name of their channel
+    bump_data_version(VIDEOS)
+
+
+@receiver([post_save, post_delete], sender=Video)
+def video_changed(sender, **kwargs) -> None:
+    bump_data_version(VIDEOS)
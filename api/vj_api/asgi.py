@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "vj_api.settings")
 
 application = get_asgi_application()
+
+# Loaded at the workers startup rather than in the first requests needing them
+from vj_api.helpers import load_word_relations  # noqa: E402
+
+load_word_relations()
@@ -1,4 +1,5 @@
 # ruff: noqa: F401
+from .best_start import compute_best_start, compute_best_starts
 from .json_renderer import ORJSONRenderer
-from .word_relations import get_related_words
+from .word_relations import get_related_words, load_word_relations
 from .youtube_duration import convert_youtube_duration_to_seconds
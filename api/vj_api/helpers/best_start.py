@@ -0,0 +1,61 @@
+import re
+
+# Timestamp at the start of a description line, e.g. "1:02:03 Title" or "(4:05) - Title"
+CHAPTER_REGEX = re.compile(r"^\W{0,3}(?:(\d{1,2}):)?(\d{1,2}):(\d{2})\W*\s(.*)$")
+# Titles of the chapters not worth starting a clip with
+INTRO_REGEX = re.compile(
+    r"intro|opening|teaser|trailer|preview|sponsor|welcome|générique|avant-propos", re.I
+)
+MIN_CHAPTERS = 3  # YouTube only shows chapters with at least 3 timestamps, starting at 0:00
+MAX_INTRO_DURATION = 90  # in seconds, when guessing the length of an intro from the duration
+MIN_PLAY_DURATION = 30  # in seconds, a clip should play at least this long after its start
+
+
+def get_chapters(description: str) -> list[tuple[int, str]]:
+    """
+    Get the (start in seconds, title) chapters listed in a video description.
+    Returns an empty list if they don't follow the YouTube rules of chapters.
+    """
+    chapters: list[tuple[int, str]] = []
+    for line in description.splitlines():
+        match = CHAPTER_REGEX.match(line.strip())
+        if match:
+            hours, minutes, seconds, title = match.groups()
+            start: int = int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds)
+            chapters.append((start, title.strip()))
+    if len(chapters) < MIN_CHAPTERS or chapters[0][0] != 0:
+        return []
+    if any(chapter[0] >= next_chapter[0] for chapter, next_chapter in zip(chapters, chapters[1:])):
+        return []
+    return chapters
+
+
+def compute_best_start(duration: int | None, description: str | None = None) -> int | None:
+    """
+    Guess where a video gets interesting, in seconds: after its intro chapters if its description
+    lists chapters, else after a share of its duration. Returns None if the duration is unknown.
+    """
+    if duration is None:
+        return None
+    best_start = 0
+    chapters: list[tuple[int, str]] = get_chapters(description) if description else []
+    if chapters:
+        for start, title in chapters:
+            best_start = start
+            if not INTRO_REGEX.search(title):
+                break
+    elif duration >= 2 * MIN_PLAY_DURATION:
+        best_start = round(min(duration * 0.1, MAX_INTRO_DURATION))
+    if best_start > duration - MIN_PLAY_DURATION:
+        return 0
+    return best_start
+
+
+def compute_best_starts(
+    videos: list[tuple[int, int | None, str | None]],
+) -> list[tuple[int, int | None]]:
+    """
+    Compute the best starts of (pk, duration, description) videos, returning (pk, best start).
+    A top level function, to be run in a process pool.
+    """
+    return [(pk, compute_best_start(duration, description)) for pk, duration, description in videos]
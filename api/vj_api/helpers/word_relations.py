@@ -1,22 +1,74 @@
-from langdetect import detect
+import threading
+import time
+from functools import lru_cache
+
+from langdetect import DetectorFactory, detect
+from langdetect.detector_factory import init_factory
 from nltk.corpus import wordnet
 
+from vj_api.settings import logger
+
+# Make language detection deterministic, as its results are persisted
+DetectorFactory.seed = 0
+
+_loaded = False
+_load_failed_at: float | None = None
+_load_lock = threading.Lock()
+# Delay before trying again to load the word relations data, when it failed (e.g. not downloaded)
+LOAD_RETRY_INTERVAL = 300
+
+
+def load_word_relations() -> bool:
+    """
+    Load the WordNet corpus and the language profiles (taking seconds), once per process, and
+    return whether they are loaded. The threads calling it during the load wait for it to end.
+    Called at the ASGI workers startup, and by `get_related_words` in the other processes, so that
+    the ones which never need them (e.g. most management commands) don't load them.
+    """
+    global _loaded, _load_failed_at
+    if _loaded:
+        return True
+    with _load_lock:
+        if _loaded:
+            return True
+        if _load_failed_at is not None and time.monotonic() - _load_failed_at < LOAD_RETRY_INTERVAL:
+            return False
+        try:
+            init_factory()
+            wordnet.ensure_loaded()
+        except Exception as e:
+            # e.g. the WordNet corpus isn't downloaded
+            _load_failed_at = time.monotonic()
+            logger.warning(f"Couldn't load the word relations data ({type(e).__name__})")
+            return False
+        _loaded = True
+        return True
+
 
 def get_related_words(theme: str) -> list[str]:
     """
     Get related words for a theme using WordNet.
-    Returns empty list if the word is not in English or not found in WordNet.
+    Returns empty list if the word is not in English or not found in WordNet, or if the word
+    relations data can't be loaded (not memoised then, see `load_word_relations`).
+    Results are memoised, as themes get requested again and again.
     """
+    if not load_word_relations():
+        return []
+    return list(_get_related_words(theme))
+
+
+@lru_cache(maxsize=1024)
+def _get_related_words(theme: str) -> tuple[str, ...]:
     try:
         # Detect if the theme is in English
         lang = detect(theme)
         if lang != "en":
-            return []
+            return ()
 
         # Get synsets for the theme
         synsets = wordnet.synsets(theme)
         if not synsets:
-            return []
+            return ()
 
         related_words = []
         for synset in synsets[:2]:  # Take first 2 synsets
@@ -29,11 +81,11 @@ def get_related_words(theme: str) -> list[str]:
             for hyponym in synset.hyponyms()[:2]:  # Limit hyponyms to avoid too many results
                 related_words.extend([lemma.name() for lemma in hyponym.lemmas()])
 
-        # Remove duplicates and the original theme word, limit to 5
-        related_words = list(set(related_words))
+        # Remove duplicates (keeping their order) and the original theme word, limit to 5
+        related_words = list(dict.fromkeys(related_words))
         related_words = [word for word in related_words if word.lower() != theme.lower()]
-        return related_words[:5]
+        return tuple(related_words[:5])
 
     except Exception:
         # Silently return empty list on any error
-        return []
+        return ()
@@ -1,14 +1,13 @@
 def convert_youtube_duration_to_seconds(duration_yt: str) -> int:
     day_time: list[str] = duration_yt.split("T")
     day_duration: str = day_time[0].replace("P", "")
+    time_duration: str = day_time[1] if len(day_time) == 2 else ""
     day_list: list[str] = day_duration.split("D")
     if len(day_list) == 2:
         day: int = int(day_list[0]) * 60 * 60 * 24
-        day_list_str: str = day_list[1]
     else:
         day = 0
-        day_list_str: str = day_list[0]
-    hour_list: list[str] = day_list_str.split("H")
+    hour_list: list[str] = time_duration.split("H")
     if len(hour_list) == 2:
         hour = int(hour_list[0]) * 60 * 60
         hour_list_str: str = hour_list[1]
@@ -0,0 +1,120 @@
+"""
+Prometheus metrics of the API hot paths, served on /api/metrics to the requests with the
+METRICS_TOKEN bearer token, and to staff users.
+With several worker processes, set PROMETHEUS_MULTIPROC_DIR to an empty directory shared by the
+workers, so that the metrics of all of them are aggregated.
+"""
+
+import functools
+import hmac
+import inspect
+import os
+import time
+from collections.abc import Callable
+
+from django.http import HttpRequest, HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from vj_api.settings import METRICS_TOKEN
+
+OPERATION_SECONDS = Histogram(
+    "vj_operation_seconds",
+    "Duration of the hot path operations",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+YOUTUBE_CALLS = Counter(
+    "vj_youtube_calls_total",
+    "Calls to the YouTube API, by outcome (ok, error, cached, coalesced with an identical call in "
+    "flight, denied by the quota scheduler)",
+    ["resource", "outcome"],
+)
+YOUTUBE_CALL_SECONDS = Histogram(
+    "vj_youtube_call_seconds", "Duration of the HTTP calls to the YouTube API", ["resource"]
+)
+YOUTUBE_QUOTA_UNITS = Counter(
+    "vj_youtube_quota_units_total", "Units of YouTube API quota spent", ["resource"]
+)
+YOUTUBE_CACHE_LOOKUPS = Counter(
+    "vj_youtube_cache_lookups_total", "Lookups in the YouTube responses cache", ["result"]
+)
+VIDEO_PICKS = Counter(
+    "vj_video_picks_total",
+    "Random videos served, by source (pool, db fallback, cold start wait)",
+    ["source"],
+)
+DB_ROWS_WRITTEN = Counter("vj_db_rows_written_total", "Video rows written in DB", ["operation"])
+
+
+def timed(operation: str) -> Callable:
+    """
+    Decorator observing the duration of a function (sync or async) in OPERATION_SECONDS.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        histogram = OPERATION_SECONDS.labels(operation)
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start: float = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - start)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start: float = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+def has_metrics_token(request: HttpRequest) -> bool:
+    return bool(METRICS_TOKEN) and hmac.compare_digest(
+        request.headers.get("Authorization", ""), f"Bearer {METRICS_TOKEN}"
+    )
+
+
+def is_allowed_to_read_metrics(request: HttpRequest) -> bool:
+    """
+    Whether the request may read the metrics and stats of the API: with the METRICS_TOKEN bearer
+    token, or from a staff user.
+    """
+    return has_metrics_token(request) or (request.user.is_authenticated and request.user.is_staff)
+
+
+async def ais_allowed_to_read_metrics(request: HttpRequest) -> bool:
+    """
+    Async version of `is_allowed_to_read_metrics`.
+    """
+    if has_metrics_token(request):
+        return True
+    user = await request.auser()
+    return user.is_authenticated and user.is_staff
+
+
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    if not is_allowed_to_read_metrics(request):
+        return HttpResponseForbidden()
+    registry: CollectorRegistry = REGISTRY
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,81 @@
+import cProfile
+import io
+import pstats
+import threading
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpRequest, HttpResponse
+
+from vj_api.settings import REQUEST_PROFILING, REQUEST_PROFILING_LINES
+
+PROFILE_PARAMETER = "profile"
+SORT_KEYS: tuple[str, ...] = ("cumulative", "tottime", "ncalls")
+
+# Only one profiler can be active at a time in a process
+profiler_lock = threading.Lock()
+
+
+class ProfilingMiddleware:
+    """
+    Returns a cProfile report of the request instead of its response, when a staff user adds
+    `profile=1` to its query string (or `profile=tottime` to sort the functions by own time).
+    The content of the streamed responses isn't profiled, only the start of their view.
+    """
+
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response) -> None:
+        if not REQUEST_PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if PROFILE_PARAMETER not in request.GET or not request.user.is_staff:
+            return self.get_response(request)
+        if not profiler_lock.acquire(blocking=False):
+            return self.busy_response()
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            self.get_response(request)
+        finally:
+            profiler.disable()
+            profiler_lock.release()
+        return self.report_response(request, profiler)
+
+    async def __acall__(self, request: HttpRequest):
+        if PROFILE_PARAMETER not in request.GET or not (await request.auser()).is_staff:
+            return await self.get_response(request)
+        if not profiler_lock.acquire(blocking=False):
+            return self.busy_response()
+        profiler = cProfile.Profile()
+        try:
+            # The other requests served by the event loop meanwhile are in the report too
+            profiler.enable()
+            await self.get_response(request)
+        finally:
+            profiler.disable()
+            profiler_lock.release()
+        return self.report_response(request, profiler)
+
+    @staticmethod
+    def busy_response() -> HttpResponse:
+        return HttpResponse(
+            "Another request is being profiled", status=409, content_type="text/plain"
+        )
+
+    @staticmethod
+    def report_response(request: HttpRequest, profiler: cProfile.Profile) -> HttpResponse:
+        sort_key: str = request.GET[PROFILE_PARAMETER]
+        if sort_key not in SORT_KEYS:
+            sort_key = "cumulative"
+        report = io.StringIO()
+        stats = pstats.Stats(profiler, stream=report)
+        stats.sort_stats(sort_key).print_stats(REQUEST_PROFILING_LINES)
+        return HttpResponse(report.getvalue(), content_type="text/plain")
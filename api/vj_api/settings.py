@@ -11,12 +11,14 @@ https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
 import os
+import tomllib
 
 import colorlog
 import sentry_sdk
-import tomllib
 from sentry_sdk.integrations.django import DjangoIntegration
 
+from vj_api.tracing import TraceSampler
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 # BASE_DIR = Path(__file__).resolve().parent.parent
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -27,6 +29,61 @@ DEBUG = os.getenv("DEBUG", "False").lower() == "true"
 # SECURITY WARNING: keep the django secret key used in production secret!
 SECRET_KEY = os.getenv("DJANGO_SECRET_KEY")
 YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")
+YOUTUBE_API_URL = os.getenv("YOUTUBE_API_URL", "https://www.googleapis.com/youtube/v3/")
+YOUTUBE_API_TIMEOUT = float(os.getenv("YOUTUBE_API_TIMEOUT", "10"))
+YOUTUBE_API_RETRIES = int(os.getenv("YOUTUBE_API_RETRIES", "2"))
+# Directory of the lock files coalescing identical YouTube calls across processes ("" to disable)
+YOUTUBE_LOCK_DIR = os.getenv("YOUTUBE_LOCK_DIR", os.path.join(BASE_DIR, "cache/locks"))
+
+# YouTube responses cache settings. The backend is either "memory" (per worker process), "django"
+# (the "youtube" cache of CACHES below, shared between processes) or "none"
+YOUTUBE_CACHE_BACKEND = os.getenv("YOUTUBE_CACHE_BACKEND", "memory")
+YOUTUBE_CACHE_TTL = int(os.getenv("YOUTUBE_CACHE_TTL", "3600"))  # in seconds
+YOUTUBE_CACHE_MAX_ENTRIES = int(os.getenv("YOUTUBE_CACHE_MAX_ENTRIES", "1000"))
+
+# YouTube quota settings, in units (a search costs 100, a videos list costs 1)
+YOUTUBE_QUOTA_DAILY_BUDGET = int(os.getenv("YOUTUBE_QUOTA_DAILY_BUDGET", "10000"))
+YOUTUBE_QUOTA_MINUTE_BUDGET = int(os.getenv("YOUTUBE_QUOTA_MINUTE_BUDGET", "1000"))
+# Share of the daily budget kept for the refills of themes running out of videos
+YOUTUBE_QUOTA_RESERVE = float(os.getenv("YOUTUBE_QUOTA_RESERVE", "0.2"))
+YOUTUBE_CIRCUIT_BREAKER_THRESHOLD = int(os.getenv("YOUTUBE_CIRCUIT_BREAKER_THRESHOLD", "5"))
+YOUTUBE_CIRCUIT_BREAKER_COOLDOWN = float(os.getenv("YOUTUBE_CIRCUIT_BREAKER_COOLDOWN", "60"))
+
+# Video pool settings (ready-to-serve videos kept in memory per theme, refilled from YouTube)
+VIDEO_POOL_SIZE = int(os.getenv("VIDEO_POOL_SIZE", "50"))
+VIDEO_POOL_LOW_WATERMARK = int(os.getenv("VIDEO_POOL_LOW_WATERMARK", "10"))
+VIDEO_POOL_COLD_START_TIMEOUT = float(os.getenv("VIDEO_POOL_COLD_START_TIMEOUT", "10"))
+# Themes with fewer videos cached in DB get their refills prioritised in the YouTube quota
+VIDEO_POOL_LOW_INVENTORY = int(os.getenv("VIDEO_POOL_LOW_INVENTORY", "200"))
+# Delay before refilling again a pool whose refill got no videos (e.g. denied by the quota)
+VIDEO_POOL_REFILL_BACKOFF = float(os.getenv("VIDEO_POOL_REFILL_BACKOFF", "60"))
+
+# Maximum delay for a worker process to see the changes of the themes made by another, in seconds
+THEME_REGISTRY_TTL = float(os.getenv("THEME_REGISTRY_TTL", "10"))
+
+# Maximum duration of a video stream, in seconds (clients reconnect after it)
+VIDEO_STREAM_MAX_DURATION = int(os.getenv("VIDEO_STREAM_MAX_DURATION", "3600"))
+
+# Sentry performance monitoring settings: share of the requests traced, per endpoint path prefix
+# (e.g. "/api/videos/stream=0,/api/videos/themes=0.01"), and share of the traced ones profiled
+SENTRY_TRACES_SAMPLE_RATE = float(os.getenv("SENTRY_TRACES_SAMPLE_RATE", "0.1"))
+SENTRY_TRACES_ENDPOINT_RATES: dict[str, float] = {
+    item.split("=")[0].strip(): float(item.split("=")[1])
+    for item in str(
+        os.getenv("SENTRY_TRACES_ENDPOINT_RATES", "/api/metrics=0,/api/videos/stream=0")
+    ).split(",")
+    if "=" in item
+}
+SENTRY_PROFILES_SAMPLE_RATE = float(os.getenv("SENTRY_PROFILES_SAMPLE_RATE", "0"))
+# Requests slower than this (in seconds) are always traced, 0 to disable
+SENTRY_SLOW_TRANSACTION_THRESHOLD = float(os.getenv("SENTRY_SLOW_TRANSACTION_THRESHOLD", "0"))
+
+# Staff users may get a cProfile report of a request with "?profile=1"
+REQUEST_PROFILING = os.getenv("REQUEST_PROFILING", "True").lower() == "true"
+REQUEST_PROFILING_LINES = int(os.getenv("REQUEST_PROFILING_LINES", "60"))
+
+# Bearer token of the Prometheus scrapes of /api/metrics (without it, only staff users may read it)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
 
 # CORS settings
 CORS_ORIGIN_ALLOW_ALL = os.getenv("CORS_ORIGIN_ALLOW_ALL", "False") == "True"
@@ -50,8 +107,69 @@ DATABASES = {
         "PASSWORD": os.getenv("POSTGRES_PASSWORD", "postgres"),
         "HOST": os.getenv("POSTGRES_HOST", "db"),  # Use 'db' as default for Docker
         "PORT": os.getenv("POSTGRES_PORT", "5432"),
+        # Check a reused connection is still alive before a request uses it (with the pool
+        # below, Django has the pool check the connections when they are taken from it)
+        "CONN_HEALTH_CHECKS": True,
     }
 }
+# Connections pool of each worker process (psycopg_pool), so that requests don't open a
+# connection each. With several workers, the sum of their max sizes must stay below the
+# max_connections of Postgres. Without the pool, connections are kept for POSTGRES_CONN_MAX_AGE
+# seconds instead, which only helps the sync (WSGI) requests.
+POSTGRES_POOL = os.getenv("POSTGRES_POOL", "True").lower() == "true"
+POSTGRES_POOL_MIN_SIZE = int(os.getenv("POSTGRES_POOL_MIN_SIZE", "1"))
+POSTGRES_POOL_MAX_SIZE = int(os.getenv("POSTGRES_POOL_MAX_SIZE", "4"))
+POSTGRES_POOL_TIMEOUT = float(os.getenv("POSTGRES_POOL_TIMEOUT", "10"))  # to get a connection
+POSTGRES_CONN_MAX_AGE = int(os.getenv("POSTGRES_CONN_MAX_AGE", "60"))
+if POSTGRES_POOL:
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": POSTGRES_POOL_MIN_SIZE,
+            "max_size": POSTGRES_POOL_MAX_SIZE,
+            "timeout": POSTGRES_POOL_TIMEOUT,
+        }
+    }
+else:
+    DATABASES["default"]["CONN_MAX_AGE"] = POSTGRES_CONN_MAX_AGE
+
+# Cache settings
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Shared between the worker processes, e.g. for the versions of the data behind ETags
+    "shared": {
+        "BACKEND": os.getenv(
+            "SHARED_CACHE_BACKEND", "django.core.cache.backends.filebased.FileBasedCache"
+        ),
+        "LOCATION": os.getenv("SHARED_CACHE_LOCATION", os.path.join(BASE_DIR, "cache/shared")),
+    },
+    "youtube": {
+        # e.g. "django.core.cache.backends.redis.RedisCache" with a "redis://..." location
+        "BACKEND": os.getenv(
+            "YOUTUBE_CACHE_DJANGO_BACKEND", "django.core.cache.backends.filebased.FileBasedCache"
+        ),
+        "LOCATION": os.getenv("YOUTUBE_CACHE_LOCATION", os.path.join(BASE_DIR, "cache/youtube")),
+        "TIMEOUT": YOUTUBE_CACHE_TTL,
+    },
+    # Counters of the YouTube quota spent, shared between the worker processes. Only atomic with
+    # Redis: with the other backends, concurrent processes may overspend the budget a little.
+    "quota": {
+        "BACKEND": os.getenv(
+            "YOUTUBE_QUOTA_CACHE_BACKEND", "django.core.cache.backends.filebased.FileBasedCache"
+        ),
+        "LOCATION": os.getenv(
+            "YOUTUBE_QUOTA_CACHE_LOCATION", os.path.join(BASE_DIR, "cache/quota")
+        ),
+        "TIMEOUT": None,
+    },
+}
+if "redis" not in CACHES["youtube"]["BACKEND"]:
+    # Redis bounds its size on its own (maxmemory), the other backends cull their entries
+    CACHES["youtube"]["OPTIONS"] = {"MAX_ENTRIES": YOUTUBE_CACHE_MAX_ENTRIES}
+if "redis" not in CACHES["quota"]["BACKEND"]:
+    # Never culled, as culling could reset the daily count: it only holds a few counters
+    CACHES["quota"]["OPTIONS"] = {"MAX_ENTRIES": 1_000_000}
 
 # Nginx proxy settings - to make Django trusts the https from the Nginx proxy
 SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
@@ -75,8 +193,10 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "vj_api.profiling.ProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "videos.middleware.CacheableResponsesMiddleware",
 ]
 
 ROOT_URLCONF = "vj_api.urls"
@@ -163,16 +283,20 @@ VERSION: str = pyproject["project"]["version"]
 
 # Sentry configuration
 if ENVIRONMENT != "local":
+    trace_sampler = TraceSampler(
+        rate=SENTRY_TRACES_SAMPLE_RATE,
+        endpoint_rates=SENTRY_TRACES_ENDPOINT_RATES,
+        slow_threshold=SENTRY_SLOW_TRANSACTION_THRESHOLD,
+    )
     sentry_sdk.init(
         dsn="https://547ba3ff493c488b93129847d6f2bb4d@o352691.ingest.sentry.io/4503999686508544",
         integrations=[DjangoIntegration()],
         release=f"{APP_NAME}@{VERSION}",
         environment=ENVIRONMENT,
-        # Set traces_sample_rate to 1.0 to capture 100%
-        # of transactions for performance monitoring.
-        # Sentry recommend adjusting this value in production.
-        traces_sample_rate=1.0,
-        profiles_sample_rate=1.0,
+        traces_sampler=trace_sampler.traces_sampler,
+        before_send_transaction=trace_sampler.before_send_transaction,
+        # Relative to the traced requests: profiling every request is costly
+        profiles_sample_rate=SENTRY_PROFILES_SAMPLE_RATE,
         # If you wish to associate users to errors (assuming you are using
         # django.contrib.auth) you may enable sending PII data.
         send_default_pii=True,
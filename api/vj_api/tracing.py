@@ -0,0 +1,69 @@
+"""
+Sampling of the Sentry performance traces: a rate per endpoint, and optionally all the slow
+requests whatever their rate (tail-based sampling).
+"""
+
+import random
+from datetime import datetime
+from urllib.parse import urlsplit
+
+
+class TraceSampler:
+    """
+    Traces a request with the rate of the longest endpoint prefix of `endpoint_rates` matching
+    its path, or with `rate`. With a `slow_threshold` (in seconds), every request is traced but
+    the transactions of the requests faster than it are dropped with the same rates before being
+    sent, so all the slow requests are kept, except on the endpoints given a rate of 0.
+    """
+
+    def __init__(
+        self, rate: float, endpoint_rates: dict[str, float], slow_threshold: float = 0
+    ) -> None:
+        self.rate = rate
+        # Longest prefixes first, so the most specific one wins
+        self.endpoint_rates: list[tuple[str, float]] = sorted(
+            endpoint_rates.items(), key=lambda item: len(item[0]), reverse=True
+        )
+        self.slow_threshold = slow_threshold
+
+    def get_endpoint_rate(self, path: str) -> float | None:
+        for prefix, rate in self.endpoint_rates:
+            if path.startswith(prefix):
+                return rate
+        return None
+
+    def get_rate(self, path: str) -> float:
+        endpoint_rate: float | None = self.get_endpoint_rate(path)
+        return self.rate if endpoint_rate is None else endpoint_rate
+
+    def traces_sampler(self, sampling_context: dict) -> float:
+        if sampling_context.get("parent_sampled") is not None:
+            # Keep the decision of the upstream service, so its traces are complete
+            return float(sampling_context["parent_sampled"])
+        path: str = (
+            sampling_context.get("asgi_scope", {}).get("path")
+            or sampling_context.get("wsgi_environ", {}).get("PATH_INFO")
+            or ""
+        )
+        if self.slow_threshold and self.get_endpoint_rate(path) != 0:
+            # The duration is only known at the end, see before_send_transaction
+            return 1.0
+        return self.get_rate(path)
+
+    def before_send_transaction(self, event: dict, hint: dict) -> dict | None:
+        if not self.slow_threshold:
+            return event
+        duration: float | None = get_duration(event)
+        if duration is None or duration >= self.slow_threshold:
+            return event
+        path: str = urlsplit(event.get("request", {}).get("url", "")).path
+        return event if random.random() < self.get_rate(path) else None
+
+
+def get_duration(event: dict) -> float | None:
+    start, end = event.get("start_timestamp"), event.get("timestamp")
+    if isinstance(start, datetime) and isinstance(end, datetime):
+        return (end - start).total_seconds()
+    if isinstance(start, int | float) and isinstance(end, int | float):
+        return end - start
+    return None
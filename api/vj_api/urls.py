@@ -20,6 +20,7 @@ from ninja import NinjaAPI
 
 from videos.api import router as videos_router
 from vj_api.helpers import ORJSONRenderer
+from vj_api.metrics import metrics_view
 from vj_api.settings import APP_NAME, DESCRIPTION, VERSION
 
 api = NinjaAPI(renderer=ORJSONRenderer(), title=APP_NAME, description=DESCRIPTION, version=VERSION)
@@ -27,6 +28,7 @@ api.add_router("/videos/", videos_router)
 
 urlpatterns = [
     path("api/admin/", admin.site.urls),
+    path("api/metrics", metrics_view),
     path("api/", api.urls),
 ]
 